@@ -2,25 +2,48 @@ from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
+from flask_migrate import Migrate
 from config import Config
 from models import db
+from database import init_database
+from instrumentation import request_metrics
+from qr_codes import qr_cache
+from reminders import reminder_dispatcher, reminder_scheduler
+from events import event_broker
+from response_cache import response_cache
+from calendars import feed_cache
+from passwords import password_hasher
+from rate_limit import auth_rate_limiter
+from search import include_name
 from routes import register_routes
+from routes.decorators import verify_token_scope, token_scope_rejected
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 # Initialize extensions
 db.init_app(app)
+init_database(app)
+request_metrics.init_app(app)
+migrate = Migrate(app, db, render_as_batch=True, include_name=include_name)
 CORS(app)
 jwt = JWTManager(app)
+jwt.token_verification_loader(verify_token_scope)
+jwt.token_verification_failed_loader(token_scope_rejected)
 mail = Mail(app)
+qr_cache.init_app(app)
+reminder_dispatcher.init_app(app)
+event_broker.init_app(app)
+response_cache.init_app(app)
+feed_cache.init_app(app)
+password_hasher.init_app(app)
+auth_rate_limiter.init_app(app)
 
 # Register routes
 register_routes(app)
 
-# Create tables
-with app.app_context():
-    db.create_all()
+# The schema is managed by migrations: run `flask db upgrade` before starting
+reminder_scheduler.init_app(app)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
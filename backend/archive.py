@@ -0,0 +1,84 @@
+"""
+Archival of finished courses.
+
+Courses that ended more than ARCHIVE_AFTER_DAYS ago are copied, with their
+enrollments, into archived_courses and archived_enrollments using
+INSERT ... SELECT, then removed from the live tables with set-based DELETEs.
+Each batch of ARCHIVE_BATCH_SIZE courses is its own transaction, so the job
+never holds long locks and can be stopped and rerun at any point.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import insert, literal, select
+from models import db, Course, Enrollment, User, ArchivedCourse, ArchivedEnrollment
+from events import event_broker
+
+COURSE_COLUMNS = [
+    'id', 'title', 'description', 'instructor_id', 'instructor_name', 'start_time', 'end_time',
+    'location', 'capacity', 'enrolled_count', 'checked_in_count', 'created_at', 'archived_at'
+]
+ENROLLMENT_COLUMNS = ['id', 'course_id', 'student_id', 'enrolled_at', 'checked_in', 'checked_in_at']
+
+def archivable_courses(cutoff, limit=None):
+    """Ids of courses that ended before the cutoff, oldest id first"""
+    query = select(Course.id).where(Course.end_time < cutoff).order_by(Course.id)
+    if limit:
+        query = query.limit(limit)
+    return [row.id for row in db.session.execute(query)]
+
+def archive_batch(course_ids, archived_at):
+    """Move one batch of courses and their enrollments; returns the number of enrollments moved"""
+    db.session.execute(insert(ArchivedCourse).from_select(COURSE_COLUMNS, select(
+        Course.id,
+        Course.title,
+        Course.description,
+        Course.instructor_id,
+        User.name,
+        Course.start_time,
+        Course.end_time,
+        Course.location,
+        Course.capacity,
+        Course.seats_taken,
+        Course.seats_checked_in,
+        Course.created_at,
+        literal(archived_at, db.DateTime)
+    ).outerjoin(User, User.id == Course.instructor_id).where(Course.id.in_(course_ids))))
+
+    result = db.session.execute(insert(ArchivedEnrollment).from_select(ENROLLMENT_COLUMNS, select(
+        Enrollment.id,
+        Enrollment.course_id,
+        Enrollment.student_id,
+        Enrollment.enrolled_at,
+        Enrollment.checked_in,
+        Enrollment.checked_in_at
+    ).where(Enrollment.course_id.in_(course_ids))))
+
+    Course.delete_courses(course_ids)
+    return result.rowcount
+
+def archive_finished_courses(older_than_days, batch_size=100):
+    """Archive every course that ended more than older_than_days ago.
+
+    Returns (courses_archived, enrollments_archived).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    courses_archived = 0
+    enrollments_archived = 0
+
+    while True:
+        course_ids = archivable_courses(cutoff, batch_size)
+        if not course_ids:
+            break
+
+        try:
+            enrollments_archived += archive_batch(course_ids, datetime.utcnow())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        courses_archived += len(course_ids)
+
+        # One event per batch; listeners such as the response cache treat it as a catalog-wide change
+        event_broker.publish(None, 'courses_archived', count=len(course_ids))
+
+    return courses_archived, enrollments_archived
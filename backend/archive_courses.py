@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script to move finished courses and their enrollments into the archive tables.
+Usage: python archive_courses.py [--days N] [--batch-size N] [--dry-run]
+
+Defaults come from ARCHIVE_AFTER_DAYS and ARCHIVE_BATCH_SIZE. Safe to run from cron.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from app import app
+from archive import archivable_courses, archive_finished_courses
+
+def archive_courses(days, batch_size, dry_run=False):
+    with app.app_context():
+        if dry_run:
+            course_ids = archivable_courses(datetime.utcnow() - timedelta(days=days))
+            print(f"{len(course_ids)} courses ended more than {days} days ago")
+            return
+        courses, enrollments = archive_finished_courses(days, batch_size)
+        print(f"Archived {courses} courses and {enrollments} enrollments")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archive finished courses')
+    parser.add_argument('--days', type=int, default=app.config['ARCHIVE_AFTER_DAYS'], help='Archive courses that ended more than this many days ago')
+    parser.add_argument('--batch-size', type=int, default=app.config['ARCHIVE_BATCH_SIZE'], help='Courses moved per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the courses that would be archived')
+    args = parser.parse_args()
+
+    if args.days < 1 or args.batch_size < 1:
+        parser.error('--days and --batch-size must be positive')
+
+    archive_courses(args.days, args.batch_size, args.dry_run)
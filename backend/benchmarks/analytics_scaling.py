@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/admin/analytics as the number of enrollments grows.
+Usage: python -m benchmarks.analytics_scaling [--scales 10000,100000,1000000] [--courses 1000] [--repeat 20]
+
+Each scale reseeds a throwaway SQLite database. Analytics reads the per-course
+counters, so the time per request should stay flat across scales.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+def run_scale(app, total_enrollments, num_courses, repeat):
+    from flask_jwt_extended import create_access_token
+    from models import db
+    from benchmarks.seed import seed_database
+
+    per_course = max(total_enrollments // num_courses, 1)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        admin_id, _, _ = seed_database(num_courses, per_course, per_course)
+        seed_seconds = time.perf_counter() - started
+        token = create_access_token(identity=admin_id, additional_claims={'role': 'admin'})
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/api/admin/analytics', headers=headers)  # warm up
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get('/api/admin/analytics', headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+
+    return {
+        'enrollments': per_course * num_courses,
+        'seed_seconds': seed_seconds,
+        'median_ms': statistics.median(timings),
+        'max_ms': max(timings)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='10000,100000,1000000')
+    parser.add_argument('--courses', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # Point the app at a throwaway database before it is imported
+    db_dir = tempfile.mkdtemp(prefix='bench-analytics-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(db_dir, 'bench.db')
+    from app import app
+
+    print(f"{'enrollments':>12} {'seed (s)':>10} {'median (ms)':>12} {'max (ms)':>10}")
+    for scale in [int(s) for s in args.scales.split(',')]:
+        result = run_scale(app, scale, args.courses, args.repeat)
+        print(f"{result['enrollments']:>12} {result['seed_seconds']:>10.1f} {result['median_ms']:>12.2f} {result['max_ms']:>10.2f}")
+
+if __name__ == '__main__':
+    main()
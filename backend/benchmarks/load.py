@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Load test the booking hot paths with concurrent clients against the real app.
+Usage: python -m benchmarks.load [--courses 200] [--students 5000] [--enrollments-per-course 50]
+                                 [--clients 8] [--requests 500] [--scenarios catalog,enroll,qr,checkin,analytics]
+                                 [--output results.json] [--compare baseline.json]
+
+Seeds a throwaway SQLite database (or --database-url), then runs each scenario as
+a fixed list of requests spread over --clients threads, each with its own test
+client. Reports p50/p95/p99 latency, throughput and SQL queries per request.
+--output writes the results as JSON, and --compare prints the change against
+a previous JSON run, so regressions show up across commits.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+SCENARIOS = ['catalog', 'enroll', 'qr', 'checkin', 'analytics']
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+class QueryCounter:
+    """Counts SQL statements per thread; each test client request runs on its caller's thread"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args, **kwargs):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+def prepare(app, args):
+    """Seed data and build the request list for every scenario"""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import update
+    from models import db, Course, Enrollment
+    from benchmarks.seed import seed_database
+
+    def auth(user_id, role):
+        token = create_access_token(identity=user_id, additional_claims={'role': role})
+        return {'Authorization': f'Bearer {token}'}
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        admin_id, student_ids, course_ids = seed_database(
+            args.courses, args.students, args.enrollments_per_course, checked_in_ratio=0.5
+        )
+        seed_seconds = time.perf_counter() - started
+
+        # Leave room for every enroll request in the upcoming courses
+        upcoming = [row.id for row in db.session.query(Course.id).filter(
+            Course.start_time > datetime.utcnow()
+        ).order_by(Course.start_time)]
+        db.session.execute(update(Course).where(Course.id.in_(upcoming)).values(capacity=Course.capacity + args.requests))
+        db.session.commit()
+
+        enrolled = set(db.session.query(Enrollment.student_id, Enrollment.course_id))
+        pending = db.session.query(Enrollment.id, Enrollment.student_id, Enrollment.qr_code_data).filter(
+            Enrollment.checked_in == False
+        ).order_by(Enrollment.id).limit(args.requests).all()
+        owned = db.session.query(Enrollment.id, Enrollment.student_id).order_by(Enrollment.id.desc()).limit(args.requests).all()
+
+        admin_headers = auth(admin_id, 'admin')
+        student_headers = {}
+
+        def as_student(student_id):
+            if student_id not in student_headers:
+                student_headers[student_id] = auth(student_id, 'student')
+            return student_headers[student_id]
+
+        # Distinct (student, upcoming course) pairs the student is not enrolled in yet
+        enroll_pairs = []
+        for index in range(len(student_ids) * len(upcoming)):
+            if len(enroll_pairs) >= args.requests:
+                break
+            student_id = student_ids[index % len(student_ids)]
+            course_id = upcoming[(index // len(student_ids)) % len(upcoming)] if upcoming else None
+            if course_id and (student_id, course_id) not in enrolled:
+                enroll_pairs.append((student_id, course_id))
+
+        plans = {
+            'catalog': [
+                ('GET', '/api/courses?status=upcoming&limit=24', None, None)
+            ] * args.requests,
+            'enroll': [
+                ('POST', '/api/enrollments', as_student(student_id), {'course_id': course_id})
+                for student_id, course_id in enroll_pairs
+            ],
+            'qr': [
+                ('GET', f'/api/enrollments/{enrollment_id}/qr', as_student(student_id), None)
+                for enrollment_id, student_id in owned
+            ],
+            'checkin': [
+                ('POST', '/api/checkin/verify', admin_headers, {'qr_code_data': qr_code_data})
+                for _, _, qr_code_data in pending
+            ],
+            'analytics': [
+                ('GET', '/api/admin/analytics', admin_headers, None)
+            ] * max(args.requests // 10, 1)
+        }
+
+    meta = {
+        'seed_seconds': round(seed_seconds, 2),
+        'courses': args.courses,
+        'students': args.students,
+        'enrollments_per_course': args.enrollments_per_course,
+        'upcoming_courses': len(upcoming)
+    }
+    return plans, meta
+
+def run_scenario(app, counter, plan, clients):
+    """Send every request in the plan over `clients` threads and summarize the timings"""
+    local = threading.local()
+
+    def send(spec):
+        method, url, headers, body = spec
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        counter.reset()
+        started = time.perf_counter()
+        response = local.client.open(url, method=method, headers=headers, json=body)
+        elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, counter.count, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        samples = list(executor.map(send, plan))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _, _ in samples)
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / wall, 1) if wall else None,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+        'queries_per_request': round(sum(queries for _, queries, _ in samples) / len(samples), 2) if samples else None
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results, baseline=None):
+    print(f"{'scenario':<10} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for name, result in results.items():
+        if not result['requests']:
+            print(f"{name:<10} {0:>6}  (no requests could be generated for this dataset)")
+            continue
+        print(f"{name:<10} {result['requests']:>6} {result['errors']:>6} {result['throughput_rps']:>8} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['queries_per_request']:>8}")
+
+    if not baseline:
+        return
+    print()
+    print(f"Change against {baseline.get('meta', {}).get('commit') or 'baseline'}:")
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not result['requests'] or not previous.get('requests'):
+            continue
+        changes = []
+        for key in ['p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request']:
+            if previous.get(key):
+                changes.append(f"{key} {(result[key] - previous[key]) / previous[key] * 100:+.1f}%")
+        print(f"{name:<10} " + ', '.join(changes))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--enrollments-per-course', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario (analytics runs a tenth)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--database-url', help='benchmark an existing empty database instead of a temporary SQLite file')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results from an earlier run to compare against')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Point the app at the benchmark database before it is imported
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        db_dir = tempfile.mkdtemp(prefix='bench-load-')
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(db_dir, 'bench.db')
+    from app import app
+    from models import db
+
+    plans, meta = prepare(app, args)
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        dialect = db.engine.dialect.name
+
+    results = {}
+    for name in scenarios:
+        results[name] = run_scenario(app, counter, plans[name], args.clients)
+
+    report = {
+        'meta': dict(meta, **{
+            'commit': git_commit(),
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'database': dialect,
+            'response_cache': app.config['RESPONSE_CACHE_ENABLED'],
+            'clients': args.clients
+        }),
+        'results': results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Synthetic data for benchmarks.
+Rows are bulk-inserted with executemany, bypassing the ORM and password hashing.
+"""
+
+import secrets
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from models import db, User, Course, Enrollment
+
+CHUNK_SIZE = 10000
+
+def _insert_chunked(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+    db.session.commit()
+
+def seed_database(num_courses, num_students, enrollments_per_course, checked_in_ratio=0.5, password='benchmark'):
+    """Populate the current app's database and return (admin_id, student_ids, course_ids).
+
+    Every student shares one precomputed password hash so seeding stays fast.
+    Course counters (seats_taken, seats_checked_in) are filled in to match.
+    """
+    if enrollments_per_course > num_students:
+        raise ValueError('enrollments_per_course cannot exceed num_students')
+
+    password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+    now = datetime.utcnow()
+
+    admin = User(email='bench-admin@example.com', name='Bench Admin', role='admin', password_hash=password_hash)
+    db.session.add(admin)
+    db.session.commit()
+
+    _insert_chunked(User, [{
+        'email': f'student{i}@example.com',
+        'name': f'Student {i}',
+        'role': 'student',
+        'password_hash': password_hash,
+        'created_at': now
+    } for i in range(num_students)])
+    student_ids = [row.id for row in db.session.query(User.id).filter(User.role == 'student').order_by(User.id)]
+
+    checked_in_per_course = int(enrollments_per_course * checked_in_ratio)
+    _insert_chunked(Course, [{
+        'title': f'Workshop {i}',
+        'description': 'Synthetic benchmark workshop',
+        'instructor_id': admin.id,
+        # Spread courses over two years, half in the past
+        'start_time': now + timedelta(hours=(i - num_courses // 2) * 17),
+        'end_time': now + timedelta(hours=(i - num_courses // 2) * 17 + 2),
+        'location': f'Room {i % 20}',
+        'capacity': enrollments_per_course + 10,
+        'seats_taken': enrollments_per_course,
+        'seats_checked_in': checked_in_per_course,
+        'created_at': now
+    } for i in range(num_courses)])
+    course_ids = [row.id for row in db.session.query(Course.id).order_by(Course.id)]
+
+    rows = []
+    for index, course_id in enumerate(course_ids):
+        for seat in range(enrollments_per_course):
+            student_id = student_ids[(index + seat) % num_students]
+            rows.append({
+                'student_id': student_id,
+                'course_id': course_id,
+                'enrolled_at': now,
+                'checked_in': seat < checked_in_per_course,
+                'checked_in_at': now if seat < checked_in_per_course else None,
+                'qr_code_data': f'BENCH:{course_id}:{student_id}:{secrets.token_urlsafe(8)}'
+            })
+            if len(rows) >= CHUNK_SIZE:
+                db.session.execute(insert(Enrollment), rows)
+                rows = []
+    if rows:
+        db.session.execute(insert(Enrollment), rows)
+    db.session.commit()
+
+    return admin.id, student_ids, course_ids
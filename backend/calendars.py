@@ -0,0 +1,230 @@
+"""
+iCalendar feeds of a student's booked workshops and of single courses.
+
+Calendar apps cannot log in, so feed URLs carry a signed token instead of a JWT:
+u.<user_id>.<signature> for a student's feed and c.<course_id>.<signature> for
+a course. Checking a token needs no database lookup.
+
+Each feed is rendered from one query and kept in FeedCache until an event
+touches it: the student's own enrollments and cancellations, or a change to a
+course in the feed. Catalog-wide events (imports, archival) drop everything.
+Feed bodies only depend on the data, so their ETags match across workers and
+most polls end in a 304.
+"""
+
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from models import db, Course, Enrollment
+from events import event_broker
+
+SIGNATURE_BYTES = 12
+FEED_KINDS = {'u': 'user', 'c': 'course'}
+PRODID = '-//Workshop Booking//Calendar Feed//EN'
+
+# Events that change which courses are in a feed, or what a course looks like
+ENROLLMENT_EVENTS = ('enrolled', 'cancelled')
+COURSE_EVENTS = ('course_updated', 'course_deleted')
+
+def _sign(kind, object_id):
+    key = current_app.config['CALENDAR_SIGNING_KEY'].encode('utf-8')
+    digest = hmac.new(key, f'calendar:{kind}:{object_id}'.encode('ascii'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).rstrip(b'=').decode('ascii')
+
+def feed_token(kind, object_id):
+    """Signed token for a 'user' or 'course' feed"""
+    prefix = next(prefix for prefix, name in FEED_KINDS.items() if name == kind)
+    return f'{prefix}.{object_id}.{_sign(kind, object_id)}'
+
+def parse_feed_token(token):
+    """Return (kind, object_id) for a valid token, else None"""
+    parts = token.split('.') if token else []
+    if len(parts) != 3 or parts[0] not in FEED_KINDS:
+        return None
+    try:
+        object_id = int(parts[1])
+    except ValueError:
+        return None
+
+    kind = FEED_KINDS[parts[0]]
+    if not hmac.compare_digest(_sign(kind, object_id), parts[2]):
+        return None
+    return kind, object_id
+
+def _escape(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def _fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires"""
+    if len(line.encode('utf-8')) <= 75:
+        return line
+    parts = []
+    current = ''
+    for char in line:
+        # Continuation lines start with a space, which counts toward their 75 octets
+        limit = 75 if not parts else 74
+        if len((current + char).encode('utf-8')) > limit:
+            parts.append(current)
+            current = ''
+        current += char
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+def _timestamp(value):
+    return value.strftime('%Y%m%dT%H%M%SZ') if value else None
+
+def render_calendar(name, rows):
+    """VCALENDAR text for rows of (id, title, description, location, start_time, end_time, created_at)"""
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}'
+    ]
+    for course_id, title, description, location, start_time, end_time, created_at in rows:
+        lines.extend([
+            'BEGIN:VEVENT',
+            f'UID:course-{course_id}@workshop-booking',
+            # Stable DTSTAMP keeps the body, and so the ETag, identical between renders
+            f'DTSTAMP:{_timestamp(created_at or start_time)}',
+            f'DTSTART:{_timestamp(start_time)}',
+            f'DTEND:{_timestamp(end_time)}',
+            f'SUMMARY:{_escape(title)}'
+        ])
+        if location:
+            lines.append(f'LOCATION:{_escape(location)}')
+        if description:
+            lines.append(f'DESCRIPTION:{_escape(description)}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+FEED_COLUMNS = (Course.id, Course.title, Course.description, Course.location, Course.start_time, Course.end_time, Course.created_at)
+
+def build_user_feed(user_id):
+    """(body, course_ids) for every course the student is enrolled in"""
+    rows = db.session.query(*FEED_COLUMNS).join(
+        Enrollment, Enrollment.course_id == Course.id
+    ).filter(Enrollment.student_id == user_id).order_by(Course.start_time, Course.id).all()
+    return render_calendar('My Workshops', rows), {row.id for row in rows}
+
+def build_course_feed(course_id):
+    """(body, course_ids) for one course, or None if it does not exist"""
+    row = db.session.query(*FEED_COLUMNS).filter(Course.id == course_id).first()
+    if row is None:
+        return None
+    return render_calendar(row.title, [row]), {row.id}
+
+class FeedCache:
+    """LRU of rendered feeds, invalidated per user and per course from the event broker"""
+
+    def __init__(self, max_entries=2048, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_course = {}
+        self._generation = 0
+        self._course_changes = 0
+        # key -> [builds in progress, drops since the first of them started]
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('CALENDAR_CACHE_SIZE', self.max_entries)
+        self.ttl = app.config.get('CALENDAR_CACHE_TTL', self.ttl)
+        event_broker.add_listener(self._on_event)
+
+    def _on_event(self, event):
+        if event.get('course_id') is None:
+            self.clear()
+        elif event['type'] in ENROLLMENT_EVENTS and event.get('student_id') is not None:
+            self.invalidate(('user', int(event['student_id'])))
+        elif event['type'] in COURSE_EVENTS:
+            self.invalidate_course(int(event['course_id']))
+
+    def _version(self, key):
+        # Feeds being built are not indexed by course yet, so any course change counts
+        building = self._building.get(key)
+        return (self._generation, self._course_changes, building[1] if building else 0)
+
+    def _remove(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry:
+            for course_id in entry[4]:
+                keys = self._by_course.get(course_id)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_course[course_id]
+
+    def _drop(self, key):
+        # Only feeds being built need a version bump, to keep them from being stored stale
+        building = self._building.get(key)
+        if building:
+            building[1] += 1
+        self._remove(key)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def invalidate_course(self, course_id):
+        """Drop the course's own feed and every student feed that contains it"""
+        with self._lock:
+            self._course_changes += 1
+            for key in list(self._by_course.get(course_id, ())) + [('course', course_id)]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_course.clear()
+
+    def get(self, key, build):
+        """Return (body, etag, last_modified) for a feed, rendering it with build() on a miss.
+
+        build returns (body, course_ids) or None when the feed does not exist. A
+        feed invalidated while it was being built is returned but not stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1:4]
+            self._building.setdefault(key, [0, 0])[0] += 1
+            version = self._version(key)
+
+        feed = None
+        try:
+            built = build()
+            if built is None:
+                return None
+            body, course_ids = built
+            body = body.encode('utf-8')
+            feed = (body, hashlib.sha256(body).hexdigest()[:32], datetime.utcnow().replace(microsecond=0))
+        finally:
+            with self._lock:
+                if feed is not None and self._version(key) == version:
+                    self._remove(key)
+                    self._entries[key] = (time.monotonic() + self.ttl, *feed, course_ids)
+                    for course_id in course_ids:
+                        self._by_course.setdefault(course_id, set()).add(key)
+                    while len(self._entries) > self.max_entries:
+                        self._remove(next(iter(self._entries)))
+                # Stop tracking the key once no build of it is in flight
+                building = self._building[key]
+                building[0] -= 1
+                if not building[0]:
+                    del self._building[key]
+        return feed
+
+feed_cache = FeedCache()
@@ -3,12 +3,42 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def engine_options(uri, pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping):
+    """SQLAlchemy engine options for the configured database"""
+    options = {'pool_pre_ping': pool_pre_ping}
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') in ['sqlite:', 'sqlite://']):
+        # In-memory databases use a single shared connection, not a pool
+        return options
+    options.update({
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle
+    })
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///workshop_booking.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Connection pool (ignored for in-memory SQLite); pre-ping and recycle drop stale connections
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() in ['true', 'on', '1']
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+    )
+    
+    # SQLite tuning applied on every new connection
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'True').lower() in ['true', 'on', '1']
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = False
+    QR_SIGNING_KEY = os.environ.get('QR_SIGNING_KEY') or SECRET_KEY
+    CALENDAR_SIGNING_KEY = os.environ.get('CALENDAR_SIGNING_KEY') or SECRET_KEY
     
     # Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
@@ -16,4 +46,67 @@ class Config:
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'True').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
-
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or MAIL_USERNAME
+    
+    # Background reminder delivery
+    REMINDER_WORKERS = int(os.environ.get('REMINDER_WORKERS') or 2)
+    REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE') or 50)
+    REMINDER_MAX_RETRIES = int(os.environ.get('REMINDER_MAX_RETRIES') or 3)
+    REMINDER_RETRY_BACKOFF = float(os.environ.get('REMINDER_RETRY_BACKOFF') or 2.0)
+    
+    # Automatic reminders, sent at each offset before a course starts
+    REMINDER_SCHEDULER_ENABLED = os.environ.get('REMINDER_SCHEDULER_ENABLED', 'False').lower() in ['true', 'on', '1']
+    REMINDER_SCHEDULE = os.environ.get('REMINDER_SCHEDULE') or '24h,1h'
+    REMINDER_SCHEDULER_INTERVAL = int(os.environ.get('REMINDER_SCHEDULER_INTERVAL') or 300)
+    
+    # QR code image cache
+    QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE') or 1024)
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR')
+    QR_CACHE_MAX_AGE = int(os.environ.get('QR_CACHE_MAX_AGE') or 86400)
+    
+    # Versioned cache for the public course endpoints
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() in ['true', 'on', '1']
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE') or 512)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL') or 60)
+    RESPONSE_CACHE_MAX_AGE = int(os.environ.get('RESPONSE_CACHE_MAX_AGE') or 0)
+    
+    # iCalendar feed cache; feeds are invalidated by events, the TTL only bounds missed ones
+    CALENDAR_CACHE_SIZE = int(os.environ.get('CALENDAR_CACHE_SIZE') or 2048)
+    CALENDAR_CACHE_TTL = int(os.environ.get('CALENDAR_CACHE_TTL') or 3600)
+    CALENDAR_MAX_AGE = int(os.environ.get('CALENDAR_MAX_AGE') or 300)
+    
+    # Password hashing pool; PASSWORD_HASH_METHOD takes any werkzeug method such as
+    # 'pbkdf2:sha256:600000' or 'scrypt', and older hashes are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256'
+    PASSWORD_HASH_POOL = os.environ.get('PASSWORD_HASH_POOL') or 'thread'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 32)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)
+    
+    # Token-bucket limits on login and register
+    AUTH_RATE_LIMIT_ENABLED = os.environ.get('AUTH_RATE_LIMIT_ENABLED', 'True').lower() in ['true', 'on', '1']
+    AUTH_IP_BURST = int(os.environ.get('AUTH_IP_BURST') or 20)
+    AUTH_IP_PER_MINUTE = float(os.environ.get('AUTH_IP_PER_MINUTE') or 30)
+    AUTH_EMAIL_BURST = int(os.environ.get('AUTH_EMAIL_BURST') or 5)
+    AUTH_EMAIL_PER_MINUTE = float(os.environ.get('AUTH_EMAIL_PER_MINUTE') or 5)
+    
+    # Request instrumentation: /metrics and slow-request logs
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ['true', 'on', '1']
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS') or 500)
+    SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES') or 50)
+    
+    # Archival of finished courses (run archive_courses.py from cron)
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 180)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 100)
+    
+    # Check-in
+    CHECKIN_BATCH_LIMIT = int(os.environ.get('CHECKIN_BATCH_LIMIT') or 2000)
+    
+    # Live event streams; use 'redis' to share events across workers
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND') or 'memory'
+    EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL') or 'redis://localhost:6379/0'
+    EVENTS_REDIS_CHANNEL = os.environ.get('EVENTS_REDIS_CHANNEL') or 'workshop-booking-events'
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE') or 1000)
+    # Lifetime of the stream-only tokens EventSource passes as ?jwt=
+    EVENTS_TOKEN_TTL = int(os.environ.get('EVENTS_TOKEN_TTL') or 60)
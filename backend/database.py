@@ -0,0 +1,36 @@
+"""
+Engine setup that has to happen once the app is configured.
+
+SQLite connections get WAL journaling, so readers never block the writer, a
+busy timeout, so concurrent writers wait for the lock instead of failing with
+"database is locked", and synchronous=NORMAL, which is safe under WAL.
+"""
+
+from sqlalchemy import event
+from models import db
+
+def set_sqlite_pragmas(dbapi_connection, busy_timeout, wal):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+        if wal:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+    finally:
+        cursor.close()
+
+def init_database(app):
+    """Register per-connection setup on the app's engine"""
+    with app.app_context():
+        engine = db.engine
+    
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    # WAL needs a database file; in-memory databases keep their default journal
+    wal = app.config.get('SQLITE_WAL', True) and engine.url.database not in (None, '', ':memory:')
+    busy_timeout = app.config.get('SQLITE_BUSY_TIMEOUT', 5000)
+    
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, busy_timeout, wal)
@@ -0,0 +1,125 @@
+"""
+In-process pub/sub for live enrollment and check-in events.
+
+Events are fanned out to local subscriber queues. With EVENTS_BACKEND=redis every
+worker publishes through Redis and a listener thread relays all events back into
+its local queues, so a dashboard connected to any worker sees every change.
+"""
+
+import json
+import queue
+import threading
+from datetime import datetime
+
+ALL_COURSES = '*'
+
+class RedisRelay:
+    """Relays events between workers over a Redis pub/sub channel"""
+
+    def __init__(self, url, channel, dispatch):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('EVENTS_BACKEND=redis requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self.dispatch = dispatch
+        self._thread = threading.Thread(target=self._listen, name='events-relay', daemon=True)
+        self._thread.start()
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                self.dispatch(json.loads(message['data']))
+            except (ValueError, TypeError) as e:
+                print(f"Dropped malformed event: {str(e)}")
+
+class EventBroker:
+    """Publishes course events to subscribers of that course and of all courses"""
+
+    def __init__(self):
+        self.queue_size = 1000
+        self.relay = None
+        self._listeners = []
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.queue_size = app.config.get('EVENTS_QUEUE_SIZE', self.queue_size)
+        backend = app.config.get('EVENTS_BACKEND', 'memory')
+        if backend == 'redis':
+            self.relay = RedisRelay(app.config['EVENTS_REDIS_URL'], app.config['EVENTS_REDIS_CHANNEL'], self._dispatch)
+        elif backend != 'memory':
+            raise RuntimeError(f'Unknown EVENTS_BACKEND: {backend}')
+
+    def publish(self, course_id, event_type, **data):
+        """Publish an event; call after the change is committed"""
+        event = {
+            'type': event_type,
+            'course_id': course_id,
+            'at': datetime.utcnow().isoformat(),
+            **data
+        }
+        if self.relay:
+            try:
+                self.relay.publish(event)
+                return
+            except Exception as e:
+                print(f"Failed to relay event, delivering locally: {str(e)}")
+        self._dispatch(event)
+
+    def add_listener(self, callback):
+        """Call `callback(event)` for every event this worker receives"""
+        self._listeners.append(callback)
+
+    def subscribe(self, course_id=ALL_COURSES):
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(str(course_id), set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription, course_id=ALL_COURSES):
+        with self._lock:
+            subscribers = self._subscribers.get(str(course_id))
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[str(course_id)]
+
+    def _dispatch(self, event):
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Event listener failed: {str(e)}")
+
+        with self._lock:
+            targets = list(self._subscribers.get(str(event['course_id']), ())) + list(self._subscribers.get(ALL_COURSES, ()))
+        for subscription in targets:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # A stalled client should not block publishers; it misses events instead
+                pass
+
+    def stream(self, course_id=ALL_COURSES, heartbeat=15):
+        """Yield Server-Sent Events for a subscription until the client disconnects"""
+        subscription = self.subscribe(course_id)
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'data: {json.dumps(event)}\n\n'
+        finally:
+            self.unsubscribe(subscription, course_id)
+
+event_broker = EventBroker()
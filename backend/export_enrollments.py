@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Script to export enrollments and attendance as CSV or NDJSON.
+Usage: python export_enrollments.py [--format csv|ndjson] [--course-id ID] [--from DATE] [--to DATE] [--output FILE]
+"""
+
+import argparse
+import sys
+from app import app
+from exports import EXPORT_FORMATS, export_rows, generate_export
+from routes.courses import parse_datetime
+
+def export_enrollments(fmt, output, course_id=None, start=None, end=None):
+    with app.app_context():
+        for chunk in generate_export(fmt, export_rows(course_id, start, end)):
+            output.write(chunk)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export enrollments and attendance')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--course-id', type=int)
+    parser.add_argument('--from', dest='start', help='Only courses starting at or after this ISO date')
+    parser.add_argument('--to', dest='end', help='Only courses starting before this ISO date')
+    parser.add_argument('--output', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    try:
+        start = parse_datetime(args.start) if args.start else None
+        end = parse_datetime(args.end) if args.end else None
+    except ValueError:
+        print("Invalid date format")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            export_enrollments(args.format, f, args.course_id, start, end)
+        print(f"Exported enrollments to {args.output}")
+    else:
+        export_enrollments(args.format, sys.stdout, args.course_id, start, end)
@@ -0,0 +1,78 @@
+"""
+Streaming export of enrollments and attendance as CSV or NDJSON.
+Rows come from one joined query read in batches with yield_per, so memory use
+does not grow with the size of the table.
+"""
+
+import csv
+import json
+from io import StringIO
+from models import db, Course, Enrollment, User
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_COLUMNS = [
+    ('enrollment_id', Enrollment.id),
+    ('course_id', Course.id),
+    ('course_title', Course.title),
+    ('course_start_time', Course.start_time),
+    ('course_location', Course.location),
+    ('student_id', User.id),
+    ('student_name', User.name),
+    ('student_email', User.email),
+    ('enrolled_at', Enrollment.enrolled_at),
+    ('checked_in', Enrollment.checked_in),
+    ('checked_in_at', Enrollment.checked_in_at),
+]
+
+YIELD_PER = 1000
+
+def export_rows(course_id=None, start=None, end=None):
+    """Yield export rows as tuples, optionally filtered by course and course start time"""
+    stmt = db.select(*[column for _, column in EXPORT_COLUMNS]).select_from(Enrollment).join(
+        Course, Course.id == Enrollment.course_id
+    ).join(
+        User, User.id == Enrollment.student_id
+    ).order_by(Enrollment.id)
+
+    if course_id is not None:
+        stmt = stmt.where(Enrollment.course_id == course_id)
+    if start is not None:
+        stmt = stmt.where(Course.start_time >= start)
+    if end is not None:
+        stmt = stmt.where(Course.start_time < end)
+
+    result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
+def _format_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+def generate_csv(rows):
+    """Yield CSV text chunks, starting with the header"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    count = 0
+    for row in rows:
+        writer.writerow([_format_value(value) for value in row])
+        count += 1
+        if count % YIELD_PER == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def generate_ndjson(rows):
+    """Yield one JSON object per line"""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, [_format_value(value) for value in row]))) + '\n'
+
+def generate_export(fmt, rows):
+    return generate_csv(rows) if fmt == 'csv' else generate_ndjson(rows)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script to bulk import courses and enrollments from CSV or JSON files.
+Usage: python import_data.py --instructor-email <email> [--courses FILE] [--enrollments FILE]
+
+The format is taken from the file extension (.json, otherwise CSV).
+"""
+
+import argparse
+import json
+import sys
+from app import app
+from models import User
+from imports import import_courses, import_enrollments, read_records
+
+def read_file(path):
+    fmt = 'json' if path.lower().endswith('.json') else 'csv'
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        # Courses must be fully written before enrollments can reference them
+        return list(read_records(f, fmt))
+
+def print_report(kind, report):
+    print(f"{kind}: {report.created} created, {len(report.errors)} failed")
+    for error in sorted(report.errors, key=lambda e: e['row']):
+        print(f"  row {error['row']}: {error['error']}")
+
+def import_data(instructor_email, courses_path=None, enrollments_path=None):
+    with app.app_context():
+        course_refs = {}
+        if courses_path:
+            instructor = User.query.filter_by(email=instructor_email).first()
+            if not instructor or instructor.role != 'admin':
+                print(f"Admin user {instructor_email} not found")
+                sys.exit(1)
+            report, course_refs = import_courses(read_file(courses_path), instructor.id)
+            print_report('Courses', report)
+            if course_refs:
+                print(f"Course refs: {json.dumps(course_refs)}")
+        if enrollments_path:
+            print_report('Enrollments', import_enrollments(read_file(enrollments_path), course_refs))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import courses and enrollments')
+    parser.add_argument('--instructor-email', help='Admin user that imported courses are assigned to')
+    parser.add_argument('--courses', help='CSV or JSON file of courses')
+    parser.add_argument('--enrollments', help='CSV or JSON file of enrollments')
+    args = parser.parse_args()
+
+    if not args.courses and not args.enrollments:
+        parser.error('Nothing to import')
+    if args.courses and not args.instructor_email:
+        parser.error('--instructor-email is required when importing courses')
+
+    import_data(args.instructor_email, args.courses, args.enrollments)
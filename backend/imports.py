@@ -0,0 +1,310 @@
+"""
+Bulk import of courses and enrollment rosters from CSV or JSON.
+
+Records are validated one at a time as they are read. Capacity, duplicate and
+schedule-overlap checks for enrollments run in memory against data loaded with a
+handful of set-based queries, and rows are written in chunked transactions.
+Every rejected row is reported with its 1-based row number instead of aborting
+the whole load.
+
+Course fields: title, start_time, end_time, description, location, capacity, and
+an optional ref that enrollment rows in the same import can point at.
+Enrollment fields: student_email plus course_id or course_ref.
+"""
+
+import csv
+import json
+import secrets
+from bisect import bisect_left, insort
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Course, Enrollment, User
+from qr_tokens import generate_qr_token
+from routes.courses import parse_datetime
+
+IMPORT_CHUNK_SIZE = 500
+LOOKUP_CHUNK_SIZE = 500
+
+class ImportReport:
+    """Created count and per-row errors for one kind of record"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.errors.append({'row': row, 'error': message})
+
+    def to_dict(self):
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda e: e['row'])
+        }
+
+def read_records(stream, fmt):
+    """Yield dict records from a CSV or JSON text stream"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+
+    data = json.load(stream)
+    if not isinstance(data, list):
+        raise ValueError('JSON import must be a list of objects')
+    yield from data
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def validate_course(record):
+    """Return Course column values for a record, or raise ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError('Record must be an object')
+
+    title = str(record.get('title') or '').strip()
+    if not title or not record.get('start_time') or not record.get('end_time'):
+        raise ValueError('Missing required fields')
+
+    try:
+        start_time = parse_datetime(str(record['start_time']))
+        end_time = parse_datetime(str(record['end_time']))
+    except ValueError:
+        raise ValueError('Invalid date format')
+
+    if start_time >= end_time:
+        raise ValueError('End time must be after start time')
+
+    capacity = record.get('capacity')
+    try:
+        capacity = 30 if capacity in (None, '') else int(capacity)
+    except (TypeError, ValueError):
+        capacity = 0
+    if capacity <= 0:
+        raise ValueError('Capacity must be a positive integer')
+
+    return {
+        'title': title,
+        'description': record.get('description') or '',
+        'start_time': start_time,
+        'end_time': end_time,
+        'location': record.get('location') or '',
+        'capacity': capacity
+    }
+
+def import_courses(records, instructor_id):
+    """Create courses; returns (report, {ref: course_id})"""
+    report = ImportReport()
+    refs = {}
+    chunk = []
+
+    for row_number, record in enumerate(records, 1):
+        try:
+            values = validate_course(record)
+        except ValueError as e:
+            report.error(row_number, str(e))
+            continue
+
+        chunk.append((row_number, record.get('ref'), values))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            _write_courses(chunk, instructor_id, report, refs)
+            chunk = []
+
+    if chunk:
+        _write_courses(chunk, instructor_id, report, refs)
+    return report, refs
+
+def _write_courses(chunk, instructor_id, report, refs):
+    courses = [Course(instructor_id=instructor_id, **values) for _, _, values in chunk]
+    try:
+        db.session.add_all(courses)
+        db.session.flush()
+        ids = [course.id for course in courses]
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        for row_number, _, _ in chunk:
+            report.error(row_number, f'Database error: {e.__class__.__name__}')
+        return
+
+    for course in courses:
+        db.session.expunge(course)
+    report.created += len(courses)
+    for (row_number, ref, _), course_id in zip(chunk, ids):
+        if ref not in (None, ''):
+            refs[str(ref)] = course_id
+
+def import_enrollments(records, course_refs=None):
+    """Create enrollments with capacity, duplicate and overlap checks; returns the report"""
+    course_refs = course_refs or {}
+    report = ImportReport()
+
+    # Pass 1: per-row validation while reading
+    candidates = []
+    for row_number, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            report.error(row_number, 'Record must be an object')
+            continue
+
+        email = str(record.get('student_email') or '').strip()
+        if not email:
+            report.error(row_number, 'Missing student_email')
+            continue
+
+        if record.get('course_ref') not in (None, ''):
+            course_id = course_refs.get(str(record['course_ref']))
+            if course_id is None:
+                report.error(row_number, f"Unknown course_ref {record['course_ref']}")
+                continue
+        else:
+            try:
+                course_id = int(record.get('course_id'))
+            except (TypeError, ValueError):
+                report.error(row_number, 'Missing or invalid course_id')
+                continue
+
+        candidates.append((row_number, email, course_id))
+
+    if not candidates:
+        return report
+
+    # Pass 2: load students, courses and existing enrollments with set-based queries
+    students = {}
+    for emails in _chunks({email for _, email, _ in candidates}, LOOKUP_CHUNK_SIZE):
+        for row in db.session.query(User.id, User.email, User.role).filter(User.email.in_(emails)):
+            students[row.email] = row
+
+    courses = {}
+    for ids in _chunks({course_id for _, _, course_id in candidates}, LOOKUP_CHUNK_SIZE):
+        query = db.session.query(
+            Course.id, Course.title, Course.start_time, Course.end_time, Course.capacity, Course.seats_taken
+        ).filter(Course.id.in_(ids))
+        for row in query:
+            courses[row.id] = row
+
+    resolved = []
+    seen_pairs = set()
+    for row_number, email, course_id in candidates:
+        student = students.get(email)
+        if not student:
+            report.error(row_number, f'Unknown student {email}')
+        elif student.role == 'admin':
+            report.error(row_number, 'Admins cannot enroll in courses')
+        elif course_id not in courses:
+            report.error(row_number, f'Course {course_id} not found')
+        elif (student.id, course_id) in seen_pairs:
+            report.error(row_number, 'Duplicate row in import')
+        else:
+            seen_pairs.add((student.id, course_id))
+            resolved.append((row_number, student.id, courses[course_id]))
+
+    student_ids = {student_id for _, student_id, _ in resolved}
+    existing_pairs = set()
+    existing_intervals = {}
+    now = datetime.utcnow()
+    for ids in _chunks(student_ids, LOOKUP_CHUNK_SIZE):
+        query = db.session.query(
+            Enrollment.student_id, Enrollment.course_id, Course.title, Course.start_time, Course.end_time
+        ).join(Course, Course.id == Enrollment.course_id).filter(Enrollment.student_id.in_(ids))
+        for row in query:
+            existing_pairs.add((row.student_id, row.course_id))
+            if row.end_time > now:
+                existing_intervals.setdefault(row.student_id, []).append((row.start_time, row.end_time, row.title))
+
+    # Pass 3: drop rows that clash with existing enrollments; these never depend on seats
+    existing_overlaps = {student_id: _IntervalIndex(intervals) for student_id, intervals in existing_intervals.items()}
+    remaining = []
+    for row_number, student_id, course in resolved:
+        if (student_id, course.id) in existing_pairs:
+            report.error(row_number, 'Already enrolled in this course')
+            continue
+        index = existing_overlaps.get(student_id)
+        title = index.overlapping(course.start_time, course.end_time) if index else None
+        if title is not None:
+            report.error(row_number, f'This course overlaps with "{title}" which the student is already enrolled in')
+            continue
+        remaining.append((row_number, student_id, course))
+
+    # Pass 4: first come first served in file order. A row only takes a seat once it
+    # is known not to overlap a row already admitted for the same student
+    free_seats = {course.id: course.capacity - course.seats_taken for course in courses.values()}
+    admitted_intervals = {}
+    admitted = []
+    for row_number, student_id, course in remaining:
+        kept = admitted_intervals.setdefault(student_id, [])
+        index = bisect_left(kept, (course.end_time,)) - 1
+        if index >= 0 and kept[index][1] > course.start_time:
+            report.error(row_number, f'This course overlaps with "{kept[index][2]}" in the same import')
+            continue
+        if free_seats[course.id] <= 0:
+            report.error(row_number, 'Course is full')
+            continue
+        free_seats[course.id] -= 1
+        insort(kept, (course.start_time, course.end_time, course.title))
+        admitted.append((row_number, student_id, course.id))
+
+    for chunk in _chunks(admitted, IMPORT_CHUNK_SIZE):
+        _write_enrollments(chunk, report)
+    return report
+
+class _IntervalIndex:
+    """Existing (start, end, title) intervals of one student, for bisect overlap checks"""
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in intervals]
+        # Running max end over intervals sorted by start, with its title
+        self.max_ends = []
+        for _, end, title in intervals:
+            if not self.max_ends or end > self.max_ends[-1][0]:
+                self.max_ends.append((end, title))
+            else:
+                self.max_ends.append(self.max_ends[-1])
+
+    def overlapping(self, start_time, end_time):
+        """Title of an interval overlapping [start_time, end_time), or None"""
+        index = bisect_left(self.starts, end_time) - 1
+        if index >= 0 and self.max_ends[index][0] > start_time:
+            return self.max_ends[index][1]
+        return None
+
+def _write_enrollments(chunk, report):
+    """Insert one chunk of enrollments in a single transaction"""
+    per_course = {}
+    for row_number, student_id, course_id in chunk:
+        per_course.setdefault(course_id, []).append((row_number, student_id, course_id))
+
+    full_rows = set()
+    try:
+        rows = []
+        for course_id, course_rows in per_course.items():
+            # Seats may have been taken by live enrollments since capacity was checked
+            if Course.claim_seats(course_id, len(course_rows)):
+                rows.extend(course_rows)
+            else:
+                for row_number, _, _ in course_rows:
+                    full_rows.add(row_number)
+                    report.error(row_number, 'Course is full')
+
+        enrollments = [
+            Enrollment(student_id=student_id, course_id=course_id, qr_code_data=f'PENDING:{secrets.token_urlsafe(16)}')
+            for _, student_id, course_id in rows
+        ]
+        db.session.add_all(enrollments)
+        db.session.flush()
+
+        # QR payloads need the ids, so they are generated for the whole chunk after the flush
+        for enrollment in enrollments:
+            enrollment.qr_code_data = generate_qr_token(enrollment.id, enrollment.course_id, enrollment.student_id)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        for row_number, _, _ in chunk:
+            if row_number not in full_rows:
+                report.error(row_number, f'Database error: {e.__class__.__name__}')
+        return
+
+    for enrollment in enrollments:
+        db.session.expunge(enrollment)
+    report.created += len(enrollments)
@@ -0,0 +1,246 @@
+"""
+Per-request instrumentation: SQL query counts, DB time, JSON serialization time
+and total latency, recorded per endpoint.
+
+Engine events time every statement, Flask request hooks open and close the
+per-request record, and a JSON provider subclass times serialization. Totals are
+exposed in Prometheus text format by the /metrics route, requests over the slow
+thresholds are logged as one JSON line each, and tests can wrap requests in
+request_metrics.query_budget(n) to fail when a route runs more than n queries.
+Metrics live in each worker process, so scrape every worker.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+slow_request_logger = logging.getLogger('workshop.slow_requests')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class RequestStats:
+    """Measurements for the request being handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.slowest_statement = None
+        self.slowest_seconds = 0.0
+        self.statements = None
+
+    def record_query(self, statement, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append(statement)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that adds its dumps time to the current request's stats"""
+
+    def dumps(self, obj, **kwargs):
+        stats = _current_stats()
+        if stats is None:
+            return super().dumps(obj, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats.serialize_seconds += time.perf_counter() - started
+
+def _current_stats():
+    if has_request_context():
+        return g.get('request_stats')
+    return None
+
+@contextmanager
+def serialization_timer():
+    """Count the block as serialization time, for encoders that bypass app.json"""
+    stats = _current_stats()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serialize_seconds += time.perf_counter() - started
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+class RequestMetrics:
+    """Collects per-endpoint request metrics for one app"""
+
+    def __init__(self):
+        self.enabled = True
+        self.slow_request_ms = 500
+        self.slow_request_queries = 50
+        self._requests = {}
+        self._histograms = {}
+        self._budget_records = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', self.slow_request_ms)
+        self.slow_request_queries = app.config.get('SLOW_REQUEST_QUERIES', self.slow_request_queries)
+        if not self.enabled:
+            return
+
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        from models import db
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_request(self):
+        g.request_stats = RequestStats()
+        if self._budget_records is not None:
+            g.request_stats.statements = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context rather than the pooled connection, so a
+        # statement that raises leaves nothing behind when after_cursor_execute
+        # never fires
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        stats = _current_stats()
+        if stats is not None:
+            stats.record_query(statement, time.perf_counter() - started)
+
+    def _after_request(self, response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+
+        duration = time.perf_counter() - stats.started
+        endpoint = request.url_rule.rule if request.url_rule else '<unmatched>'
+        self.record(request.method, endpoint, response.status_code, duration, stats)
+
+        if duration * 1000 >= self.slow_request_ms or stats.queries >= self.slow_request_queries:
+            slow_request_logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'endpoint': endpoint,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_ms': round(stats.db_seconds * 1000, 2),
+                'serialize_ms': round(stats.serialize_seconds * 1000, 2),
+                'queries': stats.queries,
+                'slowest_query_ms': round(stats.slowest_seconds * 1000, 2),
+                'slowest_query': (stats.slowest_statement or '')[:500]
+            }))
+
+        with self._lock:
+            if self._budget_records is not None:
+                self._budget_records.append((request.method, request.path, stats.queries, stats.statements))
+        return response
+
+    def record(self, method, endpoint, status, duration, stats):
+        with self._lock:
+            key = (method, endpoint, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            histograms = self._histograms.get((method, endpoint))
+            if histograms is None:
+                histograms = self._histograms[(method, endpoint)] = {
+                    'request_duration_seconds': Histogram(DURATION_BUCKETS),
+                    'db_duration_seconds': Histogram(DURATION_BUCKETS),
+                    'serialization_duration_seconds': Histogram(DURATION_BUCKETS),
+                    'db_queries_per_request': Histogram(QUERY_BUCKETS)
+                }
+            histograms['request_duration_seconds'].observe(duration)
+            histograms['db_duration_seconds'].observe(stats.db_seconds)
+            histograms['serialization_duration_seconds'].observe(stats.serialize_seconds)
+            histograms['db_queries_per_request'].observe(stats.queries)
+
+    def render(self):
+        """Metrics in Prometheus text exposition format"""
+        lines = [
+            '# HELP workshop_http_requests_total Requests handled, by endpoint and status.',
+            '# TYPE workshop_http_requests_total counter'
+        ]
+        with self._lock:
+            for (method, endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'workshop_http_requests_total{_labels(method=method, endpoint=endpoint, status=status)} {count}')
+
+            names = ['request_duration_seconds', 'db_duration_seconds', 'serialization_duration_seconds', 'db_queries_per_request']
+            for name in names:
+                lines.append(f'# TYPE workshop_{name} histogram')
+                for (method, endpoint), histograms in sorted(self._histograms.items()):
+                    histogram = histograms[name]
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'workshop_{name}_bucket{_labels(method=method, endpoint=endpoint, le=bound)} {count}')
+                    lines.append(f'workshop_{name}_bucket{_labels(method=method, endpoint=endpoint, le="+Inf")} {histogram.total}')
+                    lines.append(f'workshop_{name}_sum{_labels(method=method, endpoint=endpoint)} {histogram.sum}')
+                    lines.append(f'workshop_{name}_count{_labels(method=method, endpoint=endpoint)} {histogram.total}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._histograms.clear()
+
+    @contextmanager
+    def query_budget(self, max_queries):
+        """Fail with AssertionError if any request made inside the block runs more than max_queries statements.
+
+            with request_metrics.query_budget(3):
+                client.get('/api/courses')
+        """
+        records = []
+        with self._lock:
+            self._budget_records = records
+        try:
+            yield records
+        finally:
+            with self._lock:
+                self._budget_records = None
+
+        over = [record for record in records if record[2] > max_queries]
+        if over:
+            details = []
+            for method, path, queries, statements in over:
+                details.append(f'{method} {path} ran {queries} queries (budget {max_queries}):')
+                details.extend(f'  {statement}' for statement in statements or [])
+            raise AssertionError('\n'.join(details))
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,80 @@
+"""Initial schema: users, courses and enrollments
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-16 09:00:00
+
+Databases created by the old db.create_all() at startup already have these
+tables, so each one is only created when missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'courses' not in tables:
+        op.create_table(
+            'courses',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('instructor_id', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.DateTime(), nullable=False),
+            sa.Column('end_time', sa.DateTime(), nullable=False),
+            sa.Column('location', sa.String(length=200), nullable=True),
+            sa.Column('capacity', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['instructor_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_courses_start_time', 'courses', ['start_time'])
+        op.create_index('ix_courses_end_time', 'courses', ['end_time'])
+
+    if 'enrollments' not in tables:
+        op.create_table(
+            'enrollments',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+            sa.Column('checked_in', sa.Boolean(), nullable=True),
+            sa.Column('checked_in_at', sa.DateTime(), nullable=True),
+            sa.Column('qr_code_data', sa.String(length=500), nullable=False),
+            sa.ForeignKeyConstraint(['course_id'], ['courses.id']),
+            sa.ForeignKeyConstraint(['student_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('qr_code_data'),
+            sa.UniqueConstraint('student_id', 'course_id', name='unique_student_course'),
+            # Never reuse ids, so revoked QR tokens stay revoked
+            sqlite_autoincrement=True
+        )
+        op.create_index('ix_enrollments_student_id', 'enrollments', ['student_id'])
+        op.create_index('ix_enrollments_course_id', 'enrollments', ['course_id'])
+
+
+def downgrade():
+    op.drop_table('enrollments')
+    op.drop_table('courses')
+    op.drop_table('users')
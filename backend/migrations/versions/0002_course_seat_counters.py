@@ -0,0 +1,52 @@
+"""Add seat counters to courses and backfill them from enrollments
+
+Revision ID: 0002_course_seat_counters
+Revises: 0001_initial_schema
+Create Date: 2026-10-16 09:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_course_seat_counters'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+courses = sa.table(
+    'courses',
+    sa.column('id', sa.Integer),
+    sa.column('seats_taken', sa.Integer),
+    sa.column('seats_checked_in', sa.Integer)
+)
+enrollments = sa.table(
+    'enrollments',
+    sa.column('course_id', sa.Integer),
+    sa.column('checked_in', sa.Boolean)
+)
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('courses')}
+
+    with op.batch_alter_table('courses') as batch_op:
+        if 'seats_taken' not in columns:
+            batch_op.add_column(sa.Column('seats_taken', sa.Integer(), nullable=False, server_default='0'))
+        if 'seats_checked_in' not in columns:
+            batch_op.add_column(sa.Column('seats_checked_in', sa.Integer(), nullable=False, server_default='0'))
+
+    # Recount from enrollments so the counters are right however the schema got here
+    taken = sa.select(sa.func.count()).where(enrollments.c.course_id == courses.c.id).scalar_subquery()
+    checked_in = sa.select(sa.func.count()).where(
+        enrollments.c.course_id == courses.c.id,
+        enrollments.c.checked_in == sa.true()
+    ).scalar_subquery()
+    op.execute(courses.update().values(seats_taken=taken, seats_checked_in=checked_in))
+
+
+def downgrade():
+    with op.batch_alter_table('courses') as batch_op:
+        batch_op.drop_column('seats_checked_in')
+        batch_op.drop_column('seats_taken')
@@ -0,0 +1,66 @@
+"""Add sent reminders, revoked enrollments and waitlist tables
+
+Revision ID: 0003_reminders_revocations_waitlist
+Revises: 0002_course_seat_counters
+Create Date: 2026-10-16 09:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_reminders_revocations_waitlist'
+down_revision = '0002_course_seat_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'sent_reminders' not in tables:
+        op.create_table(
+            'sent_reminders',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('enrollment_id', sa.Integer(), nullable=False),
+            sa.Column('offset_minutes', sa.Integer(), nullable=False),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['enrollment_id'], ['enrollments.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('enrollment_id', 'offset_minutes', name='unique_enrollment_reminder')
+        )
+
+    if 'revoked_enrollments' not in tables:
+        op.create_table(
+            'revoked_enrollments',
+            sa.Column('enrollment_id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('revoked_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('enrollment_id')
+        )
+        op.create_index('ix_revoked_enrollments_course_id', 'revoked_enrollments', ['course_id'])
+        op.create_index('ix_revoked_enrollments_revoked_at', 'revoked_enrollments', ['revoked_at'])
+
+    if 'waitlist_entries' not in tables:
+        op.create_table(
+            'waitlist_entries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('course_id', 'student_id', name='unique_waitlist_student_course'),
+            sqlite_autoincrement=True
+        )
+        op.create_index('ix_waitlist_course_order', 'waitlist_entries', ['course_id', 'id'])
+        op.create_index('ix_waitlist_entries_student_id', 'waitlist_entries', ['student_id'])
+
+
+def downgrade():
+    op.drop_table('waitlist_entries')
+    op.drop_table('revoked_enrollments')
+    op.drop_table('sent_reminders')
@@ -0,0 +1,28 @@
+"""Add a composite (course_id, checked_in) index on enrollments
+
+Revision ID: 0004_enrollment_checkin_index
+Revises: 0003_reminders_revocations_waitlist
+Create Date: 2026-10-16 09:15:00
+
+Serves per-course attendance counts and the check-in lookups without touching
+the table rows.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_enrollment_checkin_index'
+down_revision = '0003_reminders_revocations_waitlist'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('enrollments')}
+    if 'ix_enrollments_course_checked_in' not in indexes:
+        op.create_index('ix_enrollments_course_checked_in', 'enrollments', ['course_id', 'checked_in'])
+
+
+def downgrade():
+    op.drop_index('ix_enrollments_course_checked_in', table_name='enrollments')
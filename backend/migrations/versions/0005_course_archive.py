@@ -0,0 +1,118 @@
+"""Add archive tables for finished courses and cascade enrollment deletes
+
+Revision ID: 0005_course_archive
+Revises: 0004_enrollment_checkin_index
+Create Date: 2026-10-16 09:20:00
+
+The enrollments.course_id foreign key gains ON DELETE CASCADE. SQLite cannot
+alter a constraint, so there the table is rebuilt and its AUTOINCREMENT counter
+carried over, keeping ids of deleted enrollments from being reused.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_course_archive'
+down_revision = '0004_enrollment_checkin_index'
+branch_labels = None
+depends_on = None
+
+
+def enrollments_table(ondelete):
+    """The enrollments table as of this revision, for rebuilding it on SQLite"""
+    return sa.Table(
+        'enrollments',
+        sa.MetaData(),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+        sa.Column('checked_in', sa.Boolean(), nullable=True),
+        sa.Column('checked_in_at', sa.DateTime(), nullable=True),
+        sa.Column('qr_code_data', sa.String(length=500), nullable=False),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete=ondelete),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('qr_code_data'),
+        sa.UniqueConstraint('student_id', 'course_id', name='unique_student_course'),
+        sa.Index('ix_enrollments_student_id', 'student_id'),
+        sa.Index('ix_enrollments_course_id', 'course_id'),
+        sa.Index('ix_enrollments_course_checked_in', 'course_id', 'checked_in'),
+        sqlite_autoincrement=True
+    )
+
+
+def set_course_fk_ondelete(ondelete):
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        sequence = sa.text("SELECT seq FROM sqlite_sequence WHERE name = 'enrollments'")
+        last_id = bind.execute(sequence).scalar()
+        with op.batch_alter_table('enrollments', copy_from=enrollments_table(ondelete), recreate='always'):
+            pass
+        if last_id:
+            bind.execute(
+                sa.text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'enrollments' AND seq < :seq"),
+                {'seq': last_id}
+            )
+        return
+
+    for fk in sa.inspect(bind).get_foreign_keys('enrollments'):
+        if fk['referred_table'] == 'courses' and fk['constrained_columns'] == ['course_id']:
+            if (fk['options'].get('ondelete') or '').upper() == (ondelete or '').upper():
+                return
+            op.drop_constraint(fk['name'], 'enrollments', type_='foreignkey')
+            op.create_foreign_key(fk['name'], 'enrollments', 'courses', ['course_id'], ['id'], ondelete=ondelete)
+            return
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'archived_courses' not in tables:
+        op.create_table(
+            'archived_courses',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('instructor_id', sa.Integer(), nullable=False),
+            sa.Column('instructor_name', sa.String(length=100), nullable=True),
+            sa.Column('start_time', sa.DateTime(), nullable=False),
+            sa.Column('end_time', sa.DateTime(), nullable=False),
+            sa.Column('location', sa.String(length=200), nullable=True),
+            sa.Column('capacity', sa.Integer(), nullable=True),
+            sa.Column('enrolled_count', sa.Integer(), nullable=False),
+            sa.Column('checked_in_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_archived_courses_start_time', 'archived_courses', ['start_time'])
+
+    if 'archived_enrollments' not in tables:
+        op.create_table(
+            'archived_enrollments',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+            sa.Column('checked_in', sa.Boolean(), nullable=True),
+            sa.Column('checked_in_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['course_id'], ['archived_courses.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['student_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_archived_enrollments_course_id', 'archived_enrollments', ['course_id'])
+        op.create_index('ix_archived_enrollments_student_id', 'archived_enrollments', ['student_id'])
+
+    set_course_fk_ondelete('CASCADE')
+
+
+def downgrade():
+    set_course_fk_ondelete(None)
+
+    op.drop_index('ix_archived_enrollments_student_id', table_name='archived_enrollments')
+    op.drop_index('ix_archived_enrollments_course_id', table_name='archived_enrollments')
+    op.drop_table('archived_enrollments')
+    op.drop_index('ix_archived_courses_start_time', table_name='archived_courses')
+    op.drop_table('archived_courses')
@@ -0,0 +1,68 @@
+"""Add the full-text search index over courses
+
+Revision ID: 0006_course_search
+Revises: 0005_course_archive
+Create Date: 2026-10-16 09:25:00
+
+SQLite gets an FTS5 table over title, description and location with triggers
+that keep it in sync, backfilled from the existing courses. Postgres gets a GIN
+index on a weighted tsvector expression, which needs no triggers.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_course_search'
+down_revision = '0005_course_archive'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE courses_fts USING fts5("
+    "title, description, location, content='courses', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER courses_fts_insert AFTER INSERT ON courses BEGIN "
+    "INSERT INTO courses_fts(rowid, title, description, location) VALUES (new.id, new.title, new.description, new.location); END",
+    "CREATE TRIGGER courses_fts_delete AFTER DELETE ON courses BEGIN "
+    "INSERT INTO courses_fts(courses_fts, rowid, title, description, location) VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    "CREATE TRIGGER courses_fts_update AFTER UPDATE OF title, description, location ON courses BEGIN "
+    "INSERT INTO courses_fts(courses_fts, rowid, title, description, location) VALUES ('delete', old.id, old.title, old.description, old.location); "
+    "INSERT INTO courses_fts(rowid, title, description, location) VALUES (new.id, new.title, new.description, new.location); END",
+    "INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')"
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS courses_fts_update",
+    "DROP TRIGGER IF EXISTS courses_fts_delete",
+    "DROP TRIGGER IF EXISTS courses_fts_insert",
+    "DROP TABLE IF EXISTS courses_fts"
+]
+
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if bind.dialect.name == 'sqlite':
+        if 'courses_fts' not in inspector.get_table_names():
+            for statement in SQLITE_UPGRADE:
+                op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        if 'ix_courses_search' not in {index['name'] for index in inspector.get_indexes('courses')}:
+            op.execute(f"CREATE INDEX ix_courses_search ON courses USING gin (({PG_VECTOR}))")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_courses_search")
@@ -0,0 +1,50 @@
+"""Record when each check-in was stored, separately from the scan time
+
+Revision ID: 0007_checkin_recorded_at
+Revises: 0006_course_search
+Create Date: 2026-10-16 09:35:00
+
+Offline scans keep their original scan time in checked_in_at, which can be
+earlier than a manifest a scanner already pulled. Delta manifests filter on the
+server-set checked_in_recorded_at instead, indexed per course. Existing
+check-ins are backfilled from checked_in_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_checkin_recorded_at'
+down_revision = '0006_course_search'
+branch_labels = None
+depends_on = None
+
+enrollments = sa.table(
+    'enrollments',
+    sa.column('checked_in_at', sa.DateTime),
+    sa.column('checked_in_recorded_at', sa.DateTime)
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {column['name'] for column in inspector.get_columns('enrollments')}
+    indexes = {index['name'] for index in inspector.get_indexes('enrollments')}
+
+    # A plain ADD COLUMN, so SQLite keeps the table and its AUTOINCREMENT counter
+    if 'checked_in_recorded_at' not in columns:
+        op.add_column('enrollments', sa.Column('checked_in_recorded_at', sa.DateTime(), nullable=True))
+    op.execute(
+        enrollments.update()
+        .where(enrollments.c.checked_in_recorded_at.is_(None))
+        .values(checked_in_recorded_at=enrollments.c.checked_in_at)
+    )
+    if 'ix_enrollments_course_checked_in_recorded' not in indexes:
+        op.create_index(
+            'ix_enrollments_course_checked_in_recorded', 'enrollments', ['course_id', 'checked_in_recorded_at']
+        )
+
+
+def downgrade():
+    op.drop_index('ix_enrollments_course_checked_in_recorded', table_name='enrollments')
+    op.drop_column('enrollments', 'checked_in_recorded_at')
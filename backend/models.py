@@ -1,6 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, func, case, update, delete
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import password_hasher
 
 db = SQLAlchemy()
 
@@ -18,7 +21,7 @@ class User(db.Model):
     enrollments = db.relationship('Enrollment', back_populates='student', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        self.password_hash = generate_password_hash(password, method=password_hasher.method)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -43,13 +46,69 @@ class Course(db.Model):
     end_time = db.Column(db.DateTime, nullable=False, index=True)
     location = db.Column(db.String(200))
     capacity = db.Column(db.Integer, default=30)
+    # Denormalized counters, only changed through claim_seat/release_seat/record_check_ins
+    seats_taken = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    seats_checked_in = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     instructor = db.relationship('User', foreign_keys=[instructor_id])
-    enrollments = db.relationship('Enrollment', back_populates='course', cascade='all, delete-orphan')
+    # passive_deletes: children go with set-based DELETEs (see delete_courses), never loaded one by one
+    enrollments = db.relationship('Enrollment', back_populates='course', cascade='all, delete-orphan', passive_deletes=True)
+    waitlist_entries = db.relationship('WaitlistEntry', back_populates='course', cascade='all, delete-orphan', passive_deletes=True)
     
-    def to_dict(self):
+    @classmethod
+    def query_with_counts(cls, has_free_seats=False):
+        """Query (course, enrolled_count, checked_in_count) rows in a single grouped query.
+
+        Enrollment counts are aggregated in SQL and the instructor is joined in,
+        so listing N courses does not lazy-load N instructors and N enrollment lists.
+        Pass has_free_seats=True to keep only courses with seats left.
+        """
+        counts = db.session.query(
+            Enrollment.course_id.label('course_id'),
+            func.count(Enrollment.id).label('enrolled_count'),
+            func.sum(case((Enrollment.checked_in == True, 1), else_=0)).label('checked_in_count')
+        ).group_by(Enrollment.course_id).subquery()
+        
+        query = db.session.query(
+            cls,
+            func.coalesce(counts.c.enrolled_count, 0),
+            func.coalesce(counts.c.checked_in_count, 0)
+        ).outerjoin(counts, counts.c.course_id == cls.id).options(joinedload(cls.instructor))
+        
+        if has_free_seats:
+            query = query.filter(cls.seats_taken < cls.capacity)
+        
+        return query
+    
+    @classmethod
+    def query_for_student(cls, student_id, has_free_seats=False):
+        """Like query_with_counts, with one student's enrollment and waitlist entry joined in.
+
+        Rows are (course, enrolled_count, checked_in_count, enrollment_id,
+        enrolled_at, checked_in, checked_in_at, qr_code_data, waitlist_id); the
+        student's columns are None for courses they have not joined.
+        """
+        return cls.query_with_counts(has_free_seats=has_free_seats).outerjoin(
+            Enrollment, and_(Enrollment.course_id == cls.id, Enrollment.student_id == student_id)
+        ).outerjoin(
+            WaitlistEntry, and_(WaitlistEntry.course_id == cls.id, WaitlistEntry.student_id == student_id)
+        ).add_columns(
+            Enrollment.id,
+            Enrollment.enrolled_at,
+            Enrollment.checked_in,
+            Enrollment.checked_in_at,
+            Enrollment.qr_code_data,
+            WaitlistEntry.id
+        )
+    
+    def to_dict(self, enrolled_count=None, checked_in_count=None):
+        if enrolled_count is None:
+            enrolled_count = len(self.enrollments)
+        if checked_in_count is None:
+            checked_in_count = len([e for e in self.enrollments if e.checked_in])
+        
         return {
             'id': self.id,
             'title': self.title,
@@ -60,13 +119,96 @@ class Course(db.Model):
             'end_time': self.end_time.isoformat() if self.end_time else None,
             'location': self.location,
             'capacity': self.capacity,
-            'enrolled_count': len(self.enrollments),
-            'checked_in_count': len([e for e in self.enrollments if e.checked_in]),
+            'enrolled_count': enrolled_count,
+            'checked_in_count': checked_in_count,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
     def is_full(self):
-        return len(self.enrollments) >= self.capacity
+        return self.seats_taken >= self.capacity
+    
+    @classmethod
+    def claim_seat(cls, course_id):
+        """Atomically take one seat if the course has capacity left.
+
+        A single conditional UPDATE enforces capacity in the database, so concurrent
+        enrollments cannot oversell. The row stays locked until the surrounding
+        transaction ends. Returns True if a seat was claimed.
+        """
+        return cls.claim_seats(course_id, 1)
+    
+    @classmethod
+    def claim_seats(cls, course_id, count):
+        """Atomically take `count` seats, all or nothing; returns True on success"""
+        result = db.session.execute(
+            update(cls)
+            .where(cls.id == course_id, cls.seats_taken + count <= cls.capacity)
+            .values(seats_taken=cls.seats_taken + count)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    @classmethod
+    def release_seat(cls, course_id, checked_in=False):
+        """Atomically give back one seat, and its check-in if the student had checked in"""
+        values = {'seats_taken': case((cls.seats_taken > 0, cls.seats_taken - 1), else_=0)}
+        if checked_in:
+            values['seats_checked_in'] = case((cls.seats_checked_in > 0, cls.seats_checked_in - 1), else_=0)
+        db.session.execute(
+            update(cls)
+            .where(cls.id == course_id)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @classmethod
+    def record_check_ins(cls, course_id, count=1):
+        """Atomically add newly checked-in enrollments to the course counter"""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == course_id)
+            .values(seats_checked_in=cls.seats_checked_in + count)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @classmethod
+    def delete_courses(cls, course_ids):
+        """Delete courses and their enrollments, reminders, waitlists and revocations with set-based DELETEs.
+
+        Children are deleted explicitly instead of relying on ON DELETE CASCADE,
+        because SQLite only enforces foreign keys with PRAGMA foreign_keys on.
+        Returns the number of courses deleted; the caller commits.
+        """
+        enrollment_ids = db.select(Enrollment.id).where(Enrollment.course_id.in_(course_ids))
+        for stmt in [
+            delete(SentReminder).where(SentReminder.enrollment_id.in_(enrollment_ids)),
+            delete(Enrollment).where(Enrollment.course_id.in_(course_ids)),
+            delete(WaitlistEntry).where(WaitlistEntry.course_id.in_(course_ids)),
+            delete(RevokedEnrollment).where(RevokedEnrollment.course_id.in_(course_ids))
+        ]:
+            db.session.execute(stmt.execution_options(synchronize_session=False))
+        
+        result = db.session.execute(
+            delete(cls).where(cls.id.in_(course_ids)).execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    def find_schedule_conflict(self, student_id):
+        """Return the title of a course the student is enrolled in that overlaps this one, or None.
+
+        Runs as one range query over the student's enrollments joined to courses,
+        skipping courses that have already ended.
+        """
+        row = db.session.query(Course.title).join(
+            Enrollment, Enrollment.course_id == Course.id
+        ).filter(
+            Enrollment.student_id == student_id,
+            Course.id != self.id,
+            Course.start_time < self.end_time,
+            Course.end_time > self.start_time,
+            Course.end_time > datetime.utcnow()
+        ).first()
+        return row.title if row else None
     
     def overlaps_with(self, other_course):
         """Check if this course overlaps with another course"""
@@ -77,18 +219,108 @@ class Enrollment(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False, index=True)
     enrolled_at = db.Column(db.DateTime, default=datetime.utcnow)
     checked_in = db.Column(db.Boolean, default=False)
     checked_in_at = db.Column(db.DateTime, nullable=True)
+    # Server time the check-in was stored; checked_in_at may be an earlier offline scan time
+    checked_in_recorded_at = db.Column(db.DateTime, nullable=True)
     qr_code_data = db.Column(db.String(500), unique=True, nullable=False)
     
     # Relationships
     student = db.relationship('User', back_populates='enrollments')
     course = db.relationship('Course', back_populates='enrollments')
+    sent_reminders = db.relationship('SentReminder', cascade='all, delete-orphan', passive_deletes=True)
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='unique_student_course'),)
+    # Unique constraint; ids are never reused so revoked QR tokens stay revoked
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'course_id', name='unique_student_course'),
+        # Per-course attendance counts and check-in lookups
+        db.Index('ix_enrollments_course_checked_in', 'course_id', 'checked_in'),
+        # Check-ins recorded since a manifest was pulled
+        db.Index('ix_enrollments_course_checked_in_recorded', 'course_id', 'checked_in_recorded_at'),
+        {'sqlite_autoincrement': True},
+    )
+    
+    CHECK_IN_CHUNK_SIZE = 500
+    
+    @classmethod
+    def check_in_by_qr(cls, qr_codes, checked_in_at=None):
+        """Check in enrollments by QR payload with set-based updates.
+
+        `qr_codes` is a list of payloads, or a dict mapping payloads to the time
+        each was scanned (for offline scans synced later). Scan times later than
+        checked_in_at are clamped to it; checked_in_recorded_at is always the
+        server time the check-in was stored.
+        Returns {qr_code_data: (status, row)} where status is 'checked_in',
+        'already_checked_in' or 'invalid', and row has id, course_id, student_id
+        and checked_in_at (None for invalid codes). Course check-in counters are
+        updated in the same transaction; the caller commits.
+        """
+        recorded_at = datetime.utcnow()
+        checked_in_at = checked_in_at or recorded_at
+        scanned_at = {code: min(ts, checked_in_at) for code, ts in qr_codes.items() if ts} if isinstance(qr_codes, dict) else {}
+        codes = list(dict.fromkeys(qr_codes))
+        columns = (cls.id, cls.course_id, cls.student_id, cls.qr_code_data, cls.checked_in_at)
+        results = {code: ('invalid', None) for code in codes}
+        new_per_course = {}
+        
+        for start in range(0, len(codes), cls.CHECK_IN_CHUNK_SIZE):
+            chunk = codes[start:start + cls.CHECK_IN_CHUNK_SIZE]
+            chunk_times = {code: scanned_at[code] for code in chunk if code in scanned_at}
+            time_value = case(chunk_times, value=cls.qr_code_data, else_=checked_in_at) if chunk_times else checked_in_at
+            stmt = (
+                update(cls)
+                .where(cls.qr_code_data.in_(chunk), cls.checked_in == False)
+                .values(checked_in=True, checked_in_at=time_value, checked_in_recorded_at=recorded_at)
+                .execution_options(synchronize_session=False)
+            )
+            if db.engine.dialect.update_returning:
+                updated = db.session.execute(stmt.returning(*columns)).all()
+            else:
+                updated = db.session.execute(
+                    db.select(*columns).where(cls.qr_code_data.in_(chunk), cls.checked_in == False).with_for_update()
+                ).all()
+                db.session.execute(stmt.where(cls.id.in_([row.id for row in updated])))
+            
+            for row in updated:
+                results[row.qr_code_data] = ('checked_in', row)
+                new_per_course[row.course_id] = new_per_course.get(row.course_id, 0) + 1
+            
+            remaining = [code for code in chunk if results[code][0] == 'invalid']
+            if remaining:
+                for row in db.session.execute(db.select(*columns).where(cls.qr_code_data.in_(remaining))):
+                    results[row.qr_code_data] = ('already_checked_in', row)
+        
+        for course_id, count in new_per_course.items():
+            Course.record_check_ins(course_id, count)
+        
+        return results
+    
+    @classmethod
+    def cancel(cls, enrollment_id):
+        """Delete one enrollment and its sent reminders; returns its checked_in flag.
+
+        The flag is read by the DELETE itself (or under a row lock where RETURNING
+        is not supported), so a check-in committed concurrently is never missed
+        when the course counters are released. Returns None if the enrollment was
+        already gone; the caller commits.
+        """
+        stmt = delete(cls).where(cls.id == enrollment_id).execution_options(synchronize_session=False)
+        if db.engine.dialect.delete_returning:
+            row = db.session.execute(stmt.returning(cls.checked_in)).first()
+        else:
+            row = db.session.execute(db.select(cls.checked_in).where(cls.id == enrollment_id).with_for_update()).first()
+            if row is not None:
+                db.session.execute(stmt)
+        if row is None:
+            return None
+        
+        db.session.execute(
+            delete(SentReminder).where(SentReminder.enrollment_id == enrollment_id)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(row.checked_in)
     
     def to_dict(self):
         return {
@@ -104,3 +336,123 @@ class Enrollment(db.Model):
             'qr_code_data': self.qr_code_data
         }
 
+class SentReminder(db.Model):
+    """Records that a scheduled reminder was claimed for an enrollment.
+
+    The unique constraint makes the claim the dedupe point, so several app
+    workers running the scheduler never send the same reminder twice.
+    """
+    __tablename__ = 'sent_reminders'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    enrollment_id = db.Column(db.Integer, db.ForeignKey('enrollments.id', ondelete='CASCADE'), nullable=False)
+    offset_minutes = db.Column(db.Integer, nullable=False)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('enrollment_id', 'offset_minutes', name='unique_enrollment_reminder'),)
+
+class RevokedEnrollment(db.Model):
+    """Cancelled enrollments whose signed QR tokens scanners must reject"""
+    __tablename__ = 'revoked_enrollments'
+    
+    enrollment_id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class WaitlistEntry(db.Model):
+    """A student waiting for a seat in a full course.
+
+    Entries are served in id order; the (course_id, id) index makes finding the
+    head of a course's queue a single index seek.
+    """
+    __tablename__ = 'waitlist_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    course = db.relationship('Course', back_populates='waitlist_entries')
+    student = db.relationship('User')
+    
+    __table_args__ = (
+        db.UniqueConstraint('course_id', 'student_id', name='unique_waitlist_student_course'),
+        db.Index('ix_waitlist_course_order', 'course_id', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+    
+    def position(self):
+        """1-based place in the course's queue"""
+        ahead = db.session.query(func.count(WaitlistEntry.id)).filter(
+            WaitlistEntry.course_id == self.course_id,
+            WaitlistEntry.id < self.id
+        ).scalar()
+        return ahead + 1
+    
+    def to_dict(self, position=None):
+        return {
+            'id': self.id,
+            'course_id': self.course_id,
+            'student_id': self.student_id,
+            'course_title': self.course.title if self.course else None,
+            'position': position if position is not None else self.position(),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class ArchivedCourse(db.Model):
+    """A finished course moved out of the live tables by archive.archive_finished_courses.
+
+    Keeps the original id, the instructor's name and the final attendance counts,
+    so reports over old workshops need no joins back to the live tables.
+    """
+    __tablename__ = 'archived_courses'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    instructor_id = db.Column(db.Integer, nullable=False)
+    instructor_name = db.Column(db.String(100))
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
+    end_time = db.Column(db.DateTime, nullable=False)
+    location = db.Column(db.String(200))
+    capacity = db.Column(db.Integer)
+    enrolled_count = db.Column(db.Integer, nullable=False, default=0)
+    checked_in_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    enrollments = db.relationship('ArchivedEnrollment', back_populates='course', passive_deletes=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'instructor_id': self.instructor_id,
+            'instructor_name': self.instructor_name,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'location': self.location,
+            'capacity': self.capacity,
+            'enrolled_count': self.enrolled_count,
+            'checked_in_count': self.checked_in_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+class ArchivedEnrollment(db.Model):
+    """An enrollment of an archived course; QR data is dropped since the course is over"""
+    __tablename__ = 'archived_enrollments'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('archived_courses.id', ondelete='CASCADE'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    enrolled_at = db.Column(db.DateTime)
+    checked_in = db.Column(db.Boolean, default=False)
+    checked_in_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    course = db.relationship('ArchivedCourse', back_populates='enrollments')
+    student = db.relationship('User')
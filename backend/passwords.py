@@ -0,0 +1,78 @@
+"""
+Password hashing on a bounded worker pool.
+
+Hashing is deliberately slow, so login and register hand it to a small pool
+(threads by default, since hashlib releases the GIL, or processes) instead of
+letting every request burn CPU at once. At most PASSWORD_HASH_WORKERS hashes
+run at a time with PASSWORD_HASH_QUEUE more waiting; anything beyond that is
+refused with PasswordHasherBusy so a login storm sheds load instead of starving
+enrollment requests. Stored hashes that use an older method or cost are
+upgraded on the next successful login.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class PasswordHasherBusy(Exception):
+    """The hashing pool is full or a hash took longer than the timeout"""
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = 'pbkdf2:sha256'
+        self.timeout = 10
+        self.executor = None
+        self._slots = None
+        self._prefix = None
+        self._prefix_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        pool = app.config.get('PASSWORD_HASH_POOL', 'thread')
+        if pool == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        elif pool == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='passwords')
+        else:
+            raise RuntimeError(f'Unknown PASSWORD_HASH_POOL: {pool}')
+        self._slots = threading.BoundedSemaphore(workers + app.config.get('PASSWORD_HASH_QUEUE', 32))
+
+    def _run(self, fn, *args):
+        if self.executor is None:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the job really finishes, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash uses a different method or cost than configured"""
+        return password_hash.split('$', 1)[0] != self._configured_prefix()
+
+    def _configured_prefix(self):
+        # Werkzeug fills in default costs, so hash once to learn the full method string
+        if self._prefix is None:
+            with self._prefix_lock:
+                if self._prefix is None:
+                    self._prefix = self.hash('').split('$', 1)[0]
+        return self._prefix
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+import qrcode
+import qrcode.image.svg
+
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+def qr_cache_key(qr_data, fmt='png'):
+    """Content-addressed key for a rendered QR image"""
+    return hashlib.sha256(f'{fmt}:{qr_data}'.encode('utf-8')).hexdigest()
+
+def render_qr_code(qr_data, fmt='png'):
+    """Render QR code data to PNG or SVG bytes"""
+    if fmt == 'svg':
+        img = qrcode.make(qr_data, image_factory=qrcode.image.svg.SvgPathImage, box_size=10, border=5)
+    else:
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(qr_data)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = BytesIO()
+    if fmt == 'svg':
+        img.save(buffer)
+    else:
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class QRCodeCache:
+    """LRU cache of rendered QR images with an optional on-disk store.
+
+    QR payloads never change once an enrollment exists, so images are keyed by a
+    hash of the payload and format and never need invalidation.
+    """
+
+    def __init__(self, max_entries=1024, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('QR_CACHE_SIZE', self.max_entries)
+        self.cache_dir = app.config.get('QR_CACHE_DIR') or None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, qr_data, fmt='png'):
+        """Return (image_bytes, key), rendering and storing the image on a miss"""
+        key = qr_cache_key(qr_data, fmt)
+
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image, key
+
+        image = self._read_disk(key, fmt)
+        if image is None:
+            image = render_qr_code(qr_data, fmt)
+            self._write_disk(key, fmt, image)
+
+        self._remember(key, image)
+        return image, key
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, image):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key, fmt):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{fmt}')
+
+    def _read_disk(self, key, fmt):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key, fmt), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, fmt, image):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key, fmt)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so concurrent readers never see a partial image
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to write QR cache file {path}: {str(e)}")
+
+qr_cache = QRCodeCache()
@@ -0,0 +1,69 @@
+"""
+Signed QR payloads that scanners can verify without a database lookup.
+
+Payload format: ENROLL2:<enrollment_id>:<course_id>:<student_id>:<signature>
+
+The signature is a truncated HMAC-SHA256 over the ids, keyed with a per-course
+key derived from QR_SIGNING_KEY. A scanner that downloaded a course manifest holds
+only that course's key, so a leaked device cannot mint codes for other courses.
+"""
+
+import base64
+import hashlib
+import hmac
+from flask import current_app
+
+TOKEN_PREFIX = 'ENROLL2'
+SIGNATURE_BYTES = 16
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def course_signing_key(course_id):
+    """Derive the raw HMAC key for one course"""
+    master = current_app.config['QR_SIGNING_KEY'].encode('utf-8')
+    return hmac.new(master, f'course:{course_id}'.encode('ascii'), hashlib.sha256).digest()
+
+def encoded_course_signing_key(course_id):
+    """Per-course key as base64url, for shipping to scanners in the manifest"""
+    return _b64(course_signing_key(course_id))
+
+def sign_ids(key, enrollment_id, course_id, student_id):
+    message = f'{enrollment_id}:{course_id}:{student_id}'.encode('ascii')
+    return _b64(hmac.new(key, message, hashlib.sha256).digest()[:SIGNATURE_BYTES])
+
+def generate_qr_token(enrollment_id, course_id, student_id):
+    """Build the signed QR payload for an enrollment"""
+    signature = sign_ids(course_signing_key(course_id), enrollment_id, course_id, student_id)
+    return f'{TOKEN_PREFIX}:{enrollment_id}:{course_id}:{student_id}:{signature}'
+
+def parse_qr_token(token):
+    """Split a signed payload into (enrollment_id, course_id, student_id, signature), or None"""
+    parts = token.split(':') if token else []
+    if len(parts) != 5 or parts[0] != TOKEN_PREFIX:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), parts[4]
+    except ValueError:
+        return None
+
+def verify_qr_token(token, key=None):
+    """Return (enrollment_id, course_id, student_id) if the signature is valid, else None.
+
+    Pass the raw course key when verifying offline; otherwise it is derived from
+    the app config.
+    """
+    parsed = parse_qr_token(token)
+    if not parsed:
+        return None
+
+    enrollment_id, course_id, student_id, signature = parsed
+    if key is None:
+        key = course_signing_key(course_id)
+    expected = sign_ids(key, enrollment_id, course_id, student_id)
+    if not hmac.compare_digest(expected, signature):
+        return None
+    return enrollment_id, course_id, student_id
+
+def is_signed_token(token):
+    return bool(token) and token.startswith(TOKEN_PREFIX + ':')
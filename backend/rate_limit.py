@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucketLimiter:
+    """In-process token buckets keyed by an arbitrary string.
+
+    Each key holds up to `burst` tokens and regains `per_minute` tokens a
+    minute. The least recently used keys are dropped beyond `max_keys`, which
+    only ever makes a limit more lenient.
+    """
+
+    def __init__(self, burst, per_minute, max_keys=100000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key):
+        """Take a token; returns 0 if allowed, else the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / self.rate if self.rate else float('inf')
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+class AuthRateLimiter:
+    """Per-IP and per-email limits in front of the password endpoints.
+
+    Buckets live in each worker process, so the effective limit scales with
+    the number of workers. Behind a reverse proxy, wrap the app in ProxyFix so
+    remote_addr is the client address.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.by_ip = TokenBucketLimiter(20, 30)
+        self.by_email = TokenBucketLimiter(5, 5)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('AUTH_RATE_LIMIT_ENABLED', self.enabled)
+        self.by_ip = TokenBucketLimiter(app.config.get('AUTH_IP_BURST', 20), app.config.get('AUTH_IP_PER_MINUTE', 30))
+        self.by_email = TokenBucketLimiter(app.config.get('AUTH_EMAIL_BURST', 5), app.config.get('AUTH_EMAIL_PER_MINUTE', 5))
+
+    def check(self, ip, email=None):
+        """Consume from the IP bucket and, if given, the email bucket; returns seconds to wait or 0"""
+        if not self.enabled:
+            return 0
+        retry_after = self.by_ip.consume(ip or 'unknown')
+        if email:
+            retry_after = max(retry_after, self.by_email.consume(email.strip().lower()))
+        return retry_after
+
+auth_rate_limiter = AuthRateLimiter()
@@ -0,0 +1,334 @@
+import re
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask_mail import Message
+from sqlalchemy import and_, func, insert
+from sqlalchemy.exc import IntegrityError
+from models import db, Course, Enrollment, User, SentReminder
+
+def parse_offsets(value):
+    """Parse a schedule such as '24h,1h,30m' into sorted offsets in minutes"""
+    units = {'d': 1440, 'h': 60, 'm': 1}
+    offsets = set()
+    for part in value.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)([dhm])', part)
+        if not match:
+            raise ValueError(f'Invalid reminder offset: {part}')
+        offsets.add(int(match.group(1)) * units[match.group(2)])
+    return sorted(offsets)
+
+def build_reminder_message(course, student_name, student_email):
+    """Build the reminder email for one student.
+
+    `course` is a plain dict with title, start_time and location so messages can
+    be built outside the request's database session.
+    """
+    return Message(
+        subject=f'Reminder: {course["title"]}',
+        recipients=[student_email],
+        body=f'''Hello {student_name},
+
+This is a reminder that you are enrolled in the workshop:
+
+{course["title"]}
+Date: {course["start_time"].strftime('%Y-%m-%d %H:%M')}
+Location: {course["location"] or 'TBA'}
+
+Please make sure to arrive on time and bring your QR code for check-in.
+
+See you there!
+'''
+    )
+
+class ReminderJob:
+    """Progress of one background reminder send"""
+
+    def __init__(self, course_id, total):
+        self.id = uuid.uuid4().hex
+        self.course_id = course_id
+        self.status = 'queued'
+        self.total = total
+        self.sent_count = 0
+        self.failed_count = 0
+        self.failed_recipients = []
+        self.last_error = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record_sent(self):
+        with self._lock:
+            self.sent_count += 1
+
+    def record_failed(self, recipients, error):
+        with self._lock:
+            self.failed_count += len(recipients)
+            self.failed_recipients.extend(recipients)
+            self.last_error = error
+
+    def finish(self, status):
+        with self._lock:
+            self.status = status
+            self.finished_at = datetime.utcnow()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'course_id': self.course_id,
+                'status': self.status,
+                'total': self.total,
+                'sent_count': self.sent_count,
+                'failed_count': self.failed_count,
+                'failed_recipients': list(self.failed_recipients),
+                'last_error': self.last_error,
+                'created_at': self.created_at.isoformat(),
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None
+            }
+
+class ReminderDispatcher:
+    """Sends reminder emails on a background thread pool.
+
+    Each batch is delivered over one SMTP connection. Messages that fail are
+    retried on a fresh connection with exponential backoff. Job status lives in
+    this process only, so the status endpoint must hit the worker that queued it.
+    """
+
+    MAX_TRACKED_JOBS = 100
+
+    def __init__(self):
+        self.app = None
+        self.executor = None
+        self.batch_size = 50
+        self.max_retries = 3
+        self.retry_backoff = 2.0
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('REMINDER_BATCH_SIZE', self.batch_size)
+        self.max_retries = app.config.get('REMINDER_MAX_RETRIES', self.max_retries)
+        self.retry_backoff = app.config.get('REMINDER_RETRY_BACKOFF', self.retry_backoff)
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('REMINDER_WORKERS', 2),
+            thread_name_prefix='reminders'
+        )
+
+    def submit(self, course, recipients, on_complete=None, build_message=build_reminder_message):
+        """Queue reminders for (name, email) recipients and return the job.
+
+        `on_complete(job)` is called from the worker, inside an app context,
+        once every batch has been attempted. `build_message` builds each email
+        and defaults to the course reminder.
+        """
+        job = ReminderJob(course['id'], len(recipients))
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+
+        self.executor.submit(self._run, job, course, list(recipients), on_complete, build_message)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, course, recipients, on_complete=None, build_message=build_reminder_message):
+        job.status = 'running'
+        with self.app.app_context():
+            try:
+                for start in range(0, len(recipients), self.batch_size):
+                    self._deliver(job, course, recipients[start:start + self.batch_size], build_message)
+            except Exception as e:
+                print(f"Reminder job {job.id} crashed: {str(e)}")
+                job.record_failed([], str(e))
+                job.finish('failed')
+            else:
+                job.finish('completed' if not job.failed_count else 'completed_with_errors')
+
+            if on_complete:
+                try:
+                    on_complete(job)
+                except Exception as e:
+                    print(f"Reminder job {job.id} completion hook failed: {str(e)}")
+
+    def _deliver(self, job, course, recipients, build_message=build_reminder_message):
+        """Send one batch over a single SMTP connection, retrying failures"""
+        from app import mail
+
+        pending = [(name, email, build_message(course, name, email)) for name, email in recipients]
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+            failed = []
+            attempted = 0
+            try:
+                with mail.connect() as conn:
+                    for name, email, msg in pending:
+                        attempted += 1
+                        try:
+                            conn.send(msg)
+                            job.record_sent()
+                        except smtplib.SMTPServerDisconnected as e:
+                            # The connection is gone; retry the rest on a new one
+                            last_error = str(e)
+                            failed.append((name, email, msg))
+                            break
+                        except Exception as e:
+                            last_error = str(e)
+                            failed.append((name, email, msg))
+            except Exception as e:
+                last_error = str(e)
+
+            failed.extend(pending[attempted:])
+            pending = failed
+            if not pending:
+                return
+
+        for name, email, msg in pending:
+            print(f"Failed to send email to {email}: {last_error}")
+        job.record_failed([email for name, email, msg in pending], last_error)
+
+reminder_dispatcher = ReminderDispatcher()
+
+class ReminderScheduler:
+    """Sends reminders automatically at fixed offsets before each course starts.
+
+    Each offset owns a window of start times: with offsets [60, 1440] a course
+    starting within the next hour gets the 1h reminder, and one starting between
+    1h and 24h from now gets the 24h reminder. Courses are found with a range scan
+    on the indexed start_time column, and the thread sleeps until the next course
+    enters a window (capped at the poll interval so new courses are picked up).
+    Deliveries are claimed in sent_reminders first, so concurrent schedulers in
+    other workers skip them; failed sends release their claim for a later retry.
+    """
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.app = None
+        self.offsets = []
+        self.poll_interval = 300
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def init_app(self, app):
+        self.app = app
+        self.offsets = parse_offsets(app.config.get('REMINDER_SCHEDULE', '24h,1h'))
+        self.poll_interval = app.config.get('REMINDER_SCHEDULER_INTERVAL', self.poll_interval)
+        if app.config.get('REMINDER_SCHEDULER_ENABLED') and self.offsets:
+            self.start()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stopped:
+            delay = self.poll_interval
+            try:
+                with self.app.app_context():
+                    self.run_due(datetime.utcnow())
+                    next_due = self.next_due_at(datetime.utcnow())
+                    if next_due:
+                        delay = min(delay, max((next_due - datetime.utcnow()).total_seconds(), 1))
+                    db.session.remove()
+            except Exception as e:
+                print(f"Reminder scheduler run failed: {str(e)}")
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def windows(self, now):
+        """Yield (offset_minutes, window_start, window_end) start-time windows"""
+        lower = now
+        for offset in self.offsets:
+            upper = now + timedelta(minutes=offset)
+            yield offset, lower, upper
+            lower = upper
+
+    def next_due_at(self, now):
+        """Earliest time a course enters one of the reminder windows"""
+        due = []
+        for offset in self.offsets:
+            horizon = now + timedelta(minutes=offset)
+            next_start = db.session.query(func.min(Course.start_time)).filter(Course.start_time > horizon).scalar()
+            if next_start:
+                due.append(next_start - timedelta(minutes=offset))
+        return min(due) if due else None
+
+    def run_due(self, now):
+        """Claim and queue every reminder that is due at `now`; returns the number queued"""
+        queued = 0
+        for offset, window_start, window_end in self.windows(now):
+            courses = Course.query.filter(
+                Course.start_time > window_start,
+                Course.start_time <= window_end
+            ).all()
+            for course in courses:
+                queued += self._remind_course(course, offset)
+        return queued
+
+    def _remind_course(self, course, offset):
+        recipients = db.session.query(Enrollment.id, User.name, User.email).join(
+            User, User.id == Enrollment.student_id
+        ).outerjoin(
+            SentReminder, and_(SentReminder.enrollment_id == Enrollment.id, SentReminder.offset_minutes == offset)
+        ).filter(
+            Enrollment.course_id == course.id,
+            SentReminder.id.is_(None)
+        ).all()
+        if not recipients:
+            return 0
+
+        try:
+            db.session.execute(insert(SentReminder), [
+                {'enrollment_id': enrollment_id, 'offset_minutes': offset, 'sent_at': datetime.utcnow()}
+                for enrollment_id, name, email in recipients
+            ])
+            db.session.commit()
+        except IntegrityError:
+            # Another worker claimed some of these first; recompute on the next run
+            db.session.rollback()
+            return 0
+
+        enrollment_ids = {email: enrollment_id for enrollment_id, name, email in recipients}
+
+        def release_failed(job):
+            if not job.failed_recipients:
+                return
+            failed_ids = [enrollment_ids[email] for email in job.failed_recipients if email in enrollment_ids]
+            SentReminder.query.filter(
+                SentReminder.enrollment_id.in_(failed_ids),
+                SentReminder.offset_minutes == offset
+            ).delete(synchronize_session=False)
+            db.session.commit()
+
+        self.dispatcher.submit({
+            'id': course.id,
+            'title': course.title,
+            'start_time': course.start_time,
+            'location': course.location
+        }, [(name, email) for enrollment_id, name, email in recipients], on_complete=release_failed)
+        return len(recipients)
+
+reminder_scheduler = ReminderScheduler(reminder_dispatcher)
@@ -0,0 +1,127 @@
+"""
+Versioned response cache for the public course endpoints.
+
+Cached bodies are keyed by a version counter: the catalog version for course
+lists and a per-course version for course details. Every enrollment, check-in
+and course change already publishes an event after it commits, so the cache
+bumps versions from the event broker instead of deleting entries; stale entries
+are simply never looked up again and age out of the LRU. With EVENTS_BACKEND=redis
+every worker sees every event, so invalidation is shared across workers while the
+entries themselves stay in process.
+
+The TTL bounds staleness for results that change with the clock alone, such as
+status=upcoming lists.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, request
+from events import event_broker
+
+class ResponseCache:
+    """TTL + LRU store of response bodies with strong ETags"""
+
+    def __init__(self, max_entries=512, ttl=60):
+        self.enabled = True
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_age = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._catalog_version = 0
+        self._course_versions = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', self.enabled)
+        self.max_entries = app.config.get('RESPONSE_CACHE_SIZE', self.max_entries)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+        self.max_age = app.config.get('RESPONSE_CACHE_MAX_AGE', self.max_age)
+        event_broker.add_listener(self._on_event)
+
+    def _on_event(self, event):
+        self.invalidate(event.get('course_id'))
+
+    def invalidate(self, course_id=None):
+        """Bump the catalog version and one course's version, or every course's if None"""
+        with self._lock:
+            self._catalog_version += 1
+            if course_id is None:
+                self._generation += 1
+                self._course_versions.clear()
+            else:
+                course_id = int(course_id)
+                self._course_versions[course_id] = self._course_versions.get(course_id, 0) + 1
+
+    def catalog_key(self, args, view='courses'):
+        """Key for a course list view ('courses' or 'search') with the given query arguments"""
+        with self._lock:
+            version = (self._generation, self._catalog_version)
+        return (view, version, tuple(sorted(args.items(multi=True))))
+
+    def course_key(self, course_id):
+        """Key for one course's detail response"""
+        with self._lock:
+            version = (self._generation, self._course_versions.get(course_id, 0))
+        return ('course', course_id, version)
+
+    def get(self, key):
+        """Return (body, mimetype, etag) for a live entry, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1:]
+
+    def set(self, key, body, mimetype):
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body, mimetype, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body, mimetype, etag
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
+
+def cached_response(key_func):
+    """Serve a GET view from the response cache with a strong ETag.
+
+    `key_func` receives the view arguments and must read the version before the
+    view runs, so a change committed mid-request lands under a newer key. Only
+    200 responses are cached; If-None-Match hits return 304 without touching
+    the database.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return fn(*args, **kwargs)
+
+            key = key_func(*args, **kwargs)
+            entry = response_cache.get(key)
+            if entry is None:
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                entry = response_cache.set(key, response.get_data(), response.mimetype)
+
+            body, mimetype, etag = entry
+            response = Response(body, mimetype=mimetype)
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = response_cache.max_age
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
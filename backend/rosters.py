@@ -0,0 +1,42 @@
+"""
+Course rosters built from one joined column query.
+
+Rows are plain tuples rather than ORM objects, so a large roster costs one
+SELECT instead of lazy-loading the student and course for every enrollment.
+Datetimes are left as datetime objects for fast_json to encode.
+"""
+
+from models import db, Enrollment, User
+
+# Same keys as Enrollment.to_dict()
+ROSTER_FIELDS = (
+    'id', 'student_id', 'course_id', 'student_name', 'student_email', 'course_title',
+    'enrolled_at', 'checked_in', 'checked_in_at', 'qr_code_data'
+)
+CHECKED_IN = ROSTER_FIELDS.index('checked_in')
+
+# Columnar rosters leave out the course fields, which are the same on every row
+COLUMNAR_FIELDS = tuple(field for field in ROSTER_FIELDS if field not in ('course_id', 'course_title'))
+
+def roster_rows(course):
+    """Tuples in ROSTER_FIELDS order for every enrollment in the course, by enrollment id"""
+    query = db.session.query(
+        Enrollment.id, Enrollment.student_id, User.name, User.email,
+        Enrollment.enrolled_at, Enrollment.checked_in, Enrollment.checked_in_at, Enrollment.qr_code_data
+    ).outerjoin(User, User.id == Enrollment.student_id).filter(
+        Enrollment.course_id == course.id
+    ).order_by(Enrollment.id)
+
+    return [
+        (id, student_id, course.id, name, email, course.title, enrolled_at, checked_in, checked_in_at, qr_code_data)
+        for id, student_id, name, email, enrolled_at, checked_in, checked_in_at, qr_code_data in query
+    ]
+
+def roster_records(rows):
+    """One dict per row, shaped like Enrollment.to_dict()"""
+    return [dict(zip(ROSTER_FIELDS, row)) for row in rows]
+
+def roster_columns(rows):
+    """Parallel arrays keyed by field name, for large rosters"""
+    indexes = [ROSTER_FIELDS.index(field) for field in COLUMNAR_FIELDS]
+    return {field: [row[index] for row in rows] for field, index in zip(COLUMNAR_FIELDS, indexes)}
@@ -4,6 +4,9 @@ from routes.courses import courses_bp
 from routes.enrollments import enrollments_bp
 from routes.admin import admin_bp
 from routes.checkin import checkin_bp
+from routes.metrics import metrics_bp
+from routes.me import me_bp
+from routes.calendar import calendar_bp
 
 def register_routes(app):
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -11,4 +14,7 @@ def register_routes(app):
     app.register_blueprint(enrollments_bp, url_prefix='/api/enrollments')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(checkin_bp, url_prefix='/api/checkin')
+    app.register_blueprint(me_bp, url_prefix='/api/me')
+    app.register_blueprint(calendar_bp, url_prefix='/api/calendar')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
 
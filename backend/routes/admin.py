@@ -1,114 +1,252 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_mail import Message
-from models import db, Course, Enrollment, User
+import io
+from datetime import timedelta
+from flask import Blueprint, current_app, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import create_access_token, get_jwt_identity
+from models import db, Course, Enrollment, User, ArchivedCourse, ArchivedEnrollment
+from routes.decorators import EVENTS_SCOPE, admin_required, events_token_required
+from reminders import reminder_dispatcher
+from events import event_broker, ALL_COURSES
+from exports import EXPORT_FORMATS, export_rows, generate_export
+from imports import import_courses, import_enrollments, read_records
+from rosters import CHECKED_IN, roster_rows, roster_records, roster_columns
+from fast_json import json_response
+from routes.courses import parse_datetime
 
 admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.route('/analytics', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_analytics():
     """Get analytics for all courses (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
-    courses = Course.query.all()
+    # Counters on the course row are maintained by enroll, cancel and check-in,
+    # so this reads one row per course regardless of how many enrollments exist
+    courses = Course.query.order_by(Course.id.asc()).all()
     
     analytics = []
     for course in courses:
-        enrollments = Enrollment.query.filter_by(course_id=course.id).all()
-        checked_in_count = len([e for e in enrollments if e.checked_in])
-        
+        enrolled_count = course.seats_taken
+        checked_in_count = course.seats_checked_in
         analytics.append({
             'course_id': course.id,
             'course_title': course.title,
-            'total_enrolled': len(enrollments),
+            'total_enrolled': enrolled_count,
             'checked_in': checked_in_count,
-            'not_checked_in': len(enrollments) - checked_in_count,
+            'not_checked_in': enrolled_count - checked_in_count,
             'capacity': course.capacity,
-            'attendance_rate': (checked_in_count / len(enrollments) * 100) if enrollments else 0
+            'attendance_rate': (checked_in_count / enrolled_count * 100) if enrolled_count else 0
         })
     
     return jsonify(analytics), 200
 
 @admin_bp.route('/course/<int:course_id>/analytics', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_course_analytics(course_id):
-    """Get detailed analytics for a specific course (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
+    """Get detailed analytics for a specific course (admin only)
+
+    The roster comes from one joined query and is encoded with fast_json. Pass
+    ?format=columnar to get it as parallel arrays under 'roster' instead of the
+    checked_in_students/not_checked_in_students lists.
+    """
+    fmt = request.args.get('format', 'records')
+    if fmt not in ['records', 'columnar']:
+        return jsonify({'error': "Format must be 'records' or 'columnar'"}), 400
     
     course = Course.query.get_or_404(course_id)
-    enrollments = Enrollment.query.filter_by(course_id=course_id).all()
-    
-    checked_in = [e.to_dict() for e in enrollments if e.checked_in]
-    not_checked_in = [e.to_dict() for e in enrollments if not e.checked_in]
+    rows = roster_rows(course)
+    checked_in = [row for row in rows if row[CHECKED_IN]]
     
-    return jsonify({
-        'course': course.to_dict(),
-        'total_enrolled': len(enrollments),
+    result = {
+        'course': course.to_dict(enrolled_count=len(rows), checked_in_count=len(checked_in)),
+        'total_enrolled': len(rows),
         'checked_in_count': len(checked_in),
-        'not_checked_in_count': len(not_checked_in),
-        'checked_in_students': checked_in,
-        'not_checked_in_students': not_checked_in,
-        'attendance_rate': (len(checked_in) / len(enrollments) * 100) if enrollments else 0
-    }), 200
+        'not_checked_in_count': len(rows) - len(checked_in),
+        'attendance_rate': (len(checked_in) / len(rows) * 100) if rows else 0
+    }
+    
+    if fmt == 'columnar':
+        result['roster'] = roster_columns(rows)
+    else:
+        result['checked_in_students'] = roster_records(checked_in)
+        result['not_checked_in_students'] = roster_records([row for row in rows if not row[CHECKED_IN]])
+    
+    return json_response(result)
 
 @admin_bp.route('/course/<int:course_id>/reminders', methods=['POST'])
-@jwt_required()
+@admin_required
 def send_reminders(course_id):
-    """Send reminder emails to enrolled students (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
+    """Queue reminder emails to enrolled students (admin only)
+
+    Emails are sent by a background worker; poll the returned job for progress.
+    """
     course = Course.query.get_or_404(course_id)
-    enrollments = Enrollment.query.filter_by(course_id=course_id).all()
+    recipients = db.session.query(User.name, User.email).join(
+        Enrollment, Enrollment.student_id == User.id
+    ).filter(Enrollment.course_id == course_id).all()
     
-    if not enrollments:
+    if not recipients:
         return jsonify({'error': 'No enrollments found for this course'}), 404
     
-    sent_count = 0
-    failed_count = 0
+    job = reminder_dispatcher.submit({
+        'id': course.id,
+        'title': course.title,
+        'start_time': course.start_time,
+        'location': course.location
+    }, [(name, email) for name, email in recipients])
     
-    from app import mail
+    return jsonify({
+        'message': f'Reminders queued for {len(recipients)} students',
+        'job': job.to_dict()
+    }), 202
+
+@admin_bp.route('/reminders/<job_id>', methods=['GET'])
+@admin_required
+def get_reminder_job(job_id):
+    """Get progress of a reminder job (admin only)"""
+    job = reminder_dispatcher.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Reminder job not found'}), 404
     
-    for enrollment in enrollments:
-        try:
-            student = enrollment.student
-            msg = Message(
-                subject=f'Reminder: {course.title}',
-                recipients=[student.email],
-                body=f'''Hello {student.name},
+    return jsonify(job.to_dict()), 200
 
-This is a reminder that you are enrolled in the workshop:
+@admin_bp.route('/import', methods=['POST'])
+@admin_required
+def bulk_import():
+    """Bulk import courses and enrollments (admin only)
 
-{course.title}
-Date: {course.start_time.strftime('%Y-%m-%d %H:%M')}
-Location: {course.location or 'TBA'}
+    Send JSON {"courses": [...], "enrollments": [...]} or a multipart form with
+    "courses" and/or "enrollments" files in CSV or JSON. Enrollment rows may use
+    course_ref to point at the ref of a course imported in the same request.
+    Imported courses are assigned to the calling admin.
+    """
+    try:
+        if request.files:
+            sources = {}
+            for kind in ['courses', 'enrollments']:
+                upload = request.files.get(kind)
+                if upload:
+                    fmt = 'json' if upload.filename.lower().endswith('.json') else 'csv'
+                    sources[kind] = read_records(io.TextIOWrapper(upload.stream, encoding='utf-8-sig'), fmt)
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Courses or enrollments required'}), 400
+            sources = {kind: data[kind] for kind in ['courses', 'enrollments'] if isinstance(data.get(kind), list)}
+        
+        if not sources:
+            return jsonify({'error': 'Courses or enrollments required'}), 400
+        
+        result = {}
+        course_refs = {}
+        if 'courses' in sources:
+            report, course_refs = import_courses(sources['courses'], get_jwt_identity())
+            result['courses'] = report.to_dict()
+            result['course_refs'] = course_refs
+        if 'enrollments' in sources:
+            result['enrollments'] = import_enrollments(sources['enrollments'], course_refs).to_dict()
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': f'Could not read import: {str(e)}'}), 400
+    finally:
+        # Chunks commit as they go, so even a failed import may have changed the catalog
+        event_broker.publish(None, 'catalog_imported')
+    
+    return jsonify(result), 200
 
-Please make sure to arrive on time and bring your QR code for check-in.
+@admin_bp.route('/export/enrollments', methods=['GET'])
+@admin_required
+def export_enrollments():
+    """Stream enrollments and attendance as CSV or NDJSON (admin only)
 
-See you there!
-'''
-            )
-            mail.send(msg)
-            sent_count += 1
-        except Exception as e:
-            print(f"Failed to send email to {enrollment.student.email}: {str(e)}")
-            failed_count += 1
+    Query parameters: format (csv or ndjson), course_id, and from/to to filter by
+    course start time.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
     
-    return jsonify({
-        'message': f'Reminders sent: {sent_count}, Failed: {failed_count}',
-        'sent_count': sent_count,
-        'failed_count': failed_count
-    }), 200
+    try:
+        course_id = int(request.args['course_id']) if request.args.get('course_id') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid course_id'}), 400
+    
+    try:
+        start = parse_datetime(request.args['from']) if request.args.get('from') else None
+        end = parse_datetime(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+    
+    rows = export_rows(course_id=course_id, start=start, end=end)
+    return Response(stream_with_context(generate_export(fmt, rows)), mimetype=EXPORT_FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename=enrollments.{fmt}'
+    })
+
+@admin_bp.route('/archive/courses', methods=['GET'])
+@admin_required
+def get_archived_courses():
+    """List archived courses with their final attendance, newest first (admin only)
+
+    Optional from/to filter by course start time.
+    """
+    query = ArchivedCourse.query
+    try:
+        if request.args.get('from'):
+            query = query.filter(ArchivedCourse.start_time >= parse_datetime(request.args['from']))
+        if request.args.get('to'):
+            query = query.filter(ArchivedCourse.start_time < parse_datetime(request.args['to']))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+    
+    courses = query.order_by(ArchivedCourse.start_time.desc(), ArchivedCourse.id.desc()).all()
+    return json_response([course.to_dict() for course in courses])
+
+@admin_bp.route('/archive/courses/<int:course_id>', methods=['GET'])
+@admin_required
+def get_archived_course(course_id):
+    """Get an archived course with its attendance roster (admin only)"""
+    course = ArchivedCourse.query.get(course_id)
+    if not course:
+        return jsonify({'error': 'Archived course not found'}), 404
+    
+    rows = db.session.query(
+        ArchivedEnrollment.id, ArchivedEnrollment.student_id, User.name, User.email,
+        ArchivedEnrollment.enrolled_at, ArchivedEnrollment.checked_in, ArchivedEnrollment.checked_in_at
+    ).outerjoin(User, User.id == ArchivedEnrollment.student_id).filter(
+        ArchivedEnrollment.course_id == course_id
+    ).order_by(ArchivedEnrollment.id).all()
+    
+    fields = ('id', 'student_id', 'student_name', 'student_email', 'enrolled_at', 'checked_in', 'checked_in_at')
+    return json_response({
+        'course': course.to_dict(),
+        'attendance_rate': (course.checked_in_count / course.enrolled_count * 100) if course.enrolled_count else 0,
+        'enrollments': [dict(zip(fields, row)) for row in rows]
+    })
+
+def event_stream_response(course_id):
+    return Response(event_broker.stream(course_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@admin_bp.route('/events/token', methods=['POST'])
+@admin_required
+def create_events_token():
+    """Issue a short-lived token for opening an event stream with ?jwt= (admin only)"""
+    expires_in = current_app.config['EVENTS_TOKEN_TTL']
+    token = create_access_token(
+        identity=get_jwt_identity(),
+        expires_delta=timedelta(seconds=expires_in),
+        additional_claims={'role': 'admin', 'scope': EVENTS_SCOPE}
+    )
+    return jsonify({'token': token, 'expires_in': expires_in}), 200
+
+@admin_bp.route('/events', methods=['GET'])
+@events_token_required
+def stream_all_events():
+    """Server-Sent Events for enrollments, cancellations and check-ins in all courses (admin only)"""
+    return event_stream_response(ALL_COURSES)
 
+@admin_bp.route('/course/<int:course_id>/events', methods=['GET'])
+@events_token_required
+def stream_course_events(course_id):
+    """Server-Sent Events for one course (admin only)"""
+    Course.query.get_or_404(course_id)
+    return event_stream_response(course_id)
@@ -1,10 +1,25 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
+from sqlalchemy.exc import IntegrityError
 from models import db, User
+from routes.decorators import current_user
+from passwords import password_hasher, PasswordHasherBusy
+from rate_limit import auth_rate_limiter
 from datetime import datetime
+import math
 
 auth_bp = Blueprint('auth', __name__)
 
+def too_many_attempts(retry_after):
+    response = jsonify({'error': 'Too many attempts, please try again later'})
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response, 429
+
+def hasher_busy():
+    response = jsonify({'error': 'Server busy, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -12,18 +27,33 @@ def register():
     if not data or not data.get('email') or not data.get('password') or not data.get('name'):
         return jsonify({'error': 'Missing required fields'}), 400
     
+    retry_after = auth_rate_limiter.check(request.remote_addr)
+    if retry_after:
+        return too_many_attempts(retry_after)
+    
     if User.query.filter_by(email=data['email']).first():
         return jsonify({'error': 'Email already registered'}), 400
     
+    # Don't hold a pooled connection while the password is hashed
+    db.session.close()
+    try:
+        password_hash = password_hasher.hash(data['password'])
+    except PasswordHasherBusy:
+        return hasher_busy()
+    
     user = User(
         email=data['email'],
         name=data['name'],
-        role=data.get('role', 'student')
+        role=data.get('role', 'student'),
+        password_hash=password_hash
     )
-    user.set_password(data['password'])
     
-    db.session.add(user)
-    db.session.commit()
+    try:
+        db.session.add(user)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Email already registered'}), 400
     
     access_token = create_access_token(identity=user.id, additional_claims={'role': user.role})
     
@@ -39,10 +69,27 @@ def login():
     if not data or not data.get('email') or not data.get('password'):
         return jsonify({'error': 'Missing email or password'}), 400
     
-    user = User.query.filter_by(email=data['email']).first()
+    retry_after = auth_rate_limiter.check(request.remote_addr, data['email'])
+    if retry_after:
+        return too_many_attempts(retry_after)
+    
+    row = db.session.query(User.id, User.password_hash).filter_by(email=data['email']).first()
     
-    if not user or not user.check_password(data['password']):
-        return jsonify({'error': 'Invalid credentials'}), 401
+    # Don't hold a pooled connection while the password is verified
+    db.session.close()
+    try:
+        if not row or not password_hasher.verify(row.password_hash, data['password']):
+            return jsonify({'error': 'Invalid credentials'}), 401
+        
+        new_hash = password_hasher.hash(data['password']) if password_hasher.needs_rehash(row.password_hash) else None
+    except PasswordHasherBusy:
+        return hasher_busy()
+    
+    user = db.session.get(User, row.id)
+    if new_hash:
+        # Upgrade the stored hash to the configured method and cost
+        user.password_hash = new_hash
+        db.session.commit()
     
     access_token = create_access_token(identity=user.id, additional_claims={'role': user.role})
     
@@ -54,11 +101,8 @@ def login():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user:
+    if not current_user:
         return jsonify({'error': 'User not found'}), 404
     
-    return jsonify(user.to_dict()), 200
+    return jsonify(current_user.to_dict()), 200
 
@@ -0,0 +1,55 @@
+from flask import Blueprint, Response, current_app, jsonify, request, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Course
+from calendars import feed_cache, feed_token, parse_feed_token, build_user_feed, build_course_feed
+
+calendar_bp = Blueprint('calendar', __name__)
+
+def feed_link(kind, object_id):
+    token = feed_token(kind, object_id)
+    return jsonify({
+        'token': token,
+        'url': url_for('calendar.get_feed', token=token, _external=True)
+    }), 200
+
+@calendar_bp.route('/token', methods=['GET'])
+@jwt_required()
+def get_my_feed_link():
+    """Get the subscription URL of the current user's calendar feed"""
+    return feed_link('user', get_jwt_identity())
+
+@calendar_bp.route('/course/<int:course_id>/token', methods=['GET'])
+@jwt_required()
+def get_course_feed_link(course_id):
+    """Get the subscription URL of one course's calendar feed"""
+    if not db.session.query(Course.id).filter(Course.id == course_id).first():
+        return jsonify({'error': 'Course not found'}), 404
+    
+    return feed_link('course', course_id)
+
+@calendar_bp.route('/<token>.ics', methods=['GET'])
+def get_feed(token):
+    """iCalendar feed for a signed token (public; the token is the credential)
+
+    Served from the feed cache with an ETag and Last-Modified, so polls that
+    send If-None-Match or If-Modified-Since usually get a 304.
+    """
+    parsed = parse_feed_token(token)
+    if not parsed:
+        return jsonify({'error': 'Calendar not found'}), 404
+    
+    kind, object_id = parsed
+    build = build_user_feed if kind == 'user' else build_course_feed
+    feed = feed_cache.get((kind, object_id), lambda: build(object_id))
+    if feed is None:
+        return jsonify({'error': 'Calendar not found'}), 404
+    
+    body, etag, last_modified = feed
+    response = Response(body, mimetype='text/calendar')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Student feeds list one person's bookings, so keep them out of shared caches
+    response.cache_control.private = kind == 'user'
+    response.cache_control.public = kind == 'course'
+    response.cache_control.max_age = current_app.config['CALENDAR_MAX_AGE']
+    return response.make_conditional(request)
@@ -1,48 +1,165 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Enrollment, User
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from models import db, Course, Enrollment, RevokedEnrollment
+from qr_tokens import encoded_course_signing_key, is_signed_token, verify_qr_token
+from events import event_broker
+from routes.courses import parse_datetime
+from routes.decorators import admin_required
 from datetime import datetime
 
 checkin_bp = Blueprint('checkin', __name__)
 
+CHECK_IN_MESSAGES = {
+    'checked_in': 'Check-in successful',
+    'already_checked_in': 'Already checked in',
+    'invalid': 'Invalid QR code'
+}
+
+def publish_check_ins(results):
+    """Push a checked_in event for every newly checked-in enrollment"""
+    for status, row in results.values():
+        if status == 'checked_in':
+            event_broker.publish(
+                row.course_id, 'checked_in',
+                enrollment_id=row.id,
+                student_id=row.student_id,
+                checked_in_at=row.checked_in_at.isoformat() if row.checked_in_at else None
+            )
+
+def check_in_result(qr_data, status, row):
+    """Slim per-code check-in result without loading the student or course"""
+    return {
+        'qr_code_data': qr_data,
+        'status': status,
+        'message': CHECK_IN_MESSAGES[status],
+        'enrollment_id': row.id if row else None,
+        'course_id': row.course_id if row else None,
+        'student_id': row.student_id if row else None,
+        'checked_in_at': row.checked_in_at.isoformat() if row and row.checked_in_at else None
+    }
+
 @checkin_bp.route('/verify', methods=['POST'])
-@jwt_required()
+@admin_required
 def verify_checkin():
-    """Verify and process check-in using QR code data (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
+    """Verify and process check-in using QR code data (admin only)
+
+    Pass "slim": true to skip loading the full enrollment in the response.
+    """
     data = request.get_json()
     qr_data = data.get('qr_code_data')
     
     if not qr_data:
         return jsonify({'error': 'QR code data required'}), 400
     
-    # Find enrollment by QR code data
-    enrollment = Enrollment.query.filter_by(qr_code_data=qr_data).first()
+    # A conditional update keeps concurrent scans of the same code from counting twice
+    results = Enrollment.check_in_by_qr([qr_data])
+    db.session.commit()
+    publish_check_ins(results)
+    status, row = results[qr_data]
     
-    if not enrollment:
+    if status == 'invalid':
         return jsonify({'error': 'Invalid QR code'}), 404
     
-    if enrollment.checked_in:
-        return jsonify({
-            'message': 'Already checked in',
-            'enrollment': enrollment.to_dict()
-        }), 200
+    if data.get('slim'):
+        return jsonify(check_in_result(qr_data, status, row)), 200
     
-    # Process check-in
-    enrollment.checked_in = True
-    enrollment.checked_in_at = datetime.utcnow()
-    db.session.commit()
+    enrollment = Enrollment.query.options(
+        joinedload(Enrollment.student), joinedload(Enrollment.course)
+    ).get(row.id)
     
     return jsonify({
-        'message': 'Check-in successful',
+        'message': CHECK_IN_MESSAGES[status],
         'enrollment': enrollment.to_dict()
     }), 200
 
+@checkin_bp.route('/batch', methods=['POST'])
+@admin_required
+def batch_checkin():
+    """Check in many QR codes at once, e.g. a scanner syncing its queue (admin only)
+
+    Items are QR payload strings, or {"qr_code_data": ..., "scanned_at": ISO time}
+    for scans recorded offline, so the original scan time is kept. Scan times in
+    the future are clamped to now.
+    """
+    data = request.get_json()
+    qr_codes = data.get('qr_codes') if data else None
+    
+    if not qr_codes or not isinstance(qr_codes, list):
+        return jsonify({'error': 'List of QR codes required'}), 400
+    
+    if len(qr_codes) > current_app.config['CHECKIN_BATCH_LIMIT']:
+        return jsonify({'error': f"At most {current_app.config['CHECKIN_BATCH_LIMIT']} QR codes per batch"}), 400
+    
+    scans = {}
+    try:
+        for item in qr_codes:
+            if isinstance(item, dict):
+                scanned_at = parse_datetime(item['scanned_at']) if item.get('scanned_at') else None
+                scans.setdefault(str(item['qr_code_data']), scanned_at)
+            else:
+                scans.setdefault(str(item), None)
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Each item needs qr_code_data and an optional ISO scanned_at'}), 400
+    
+    # Forged signed tokens are rejected without touching the database
+    forged = [code for code in scans if is_signed_token(code) and not verify_qr_token(code)]
+    for code in forged:
+        del scans[code]
+    
+    results = Enrollment.check_in_by_qr(scans) if scans else {}
+    db.session.commit()
+    publish_check_ins(results)
+    
+    results.update({code: ('invalid', None) for code in forged})
+    items = [check_in_result(code, *results[code]) for code in results]
+    summary = {status: 0 for status in CHECK_IN_MESSAGES}
+    for item in items:
+        summary[item['status']] += 1
+    
+    return jsonify({
+        'results': items,
+        'summary': summary
+    }), 200
+
+@checkin_bp.route('/course/<int:course_id>/manifest', methods=['GET'])
+@admin_required
+def get_checkin_manifest(course_id):
+    """Compact offline check-in manifest for one course (admin only)
+
+    Scanners verify signed QR tokens with signing_key, accept ids found in the
+    sorted enrollment_ids array and reject revoked_ids. Pass ?since=<generated_at>
+    from a previous manifest to get only enrollments, check-ins and revocations
+    since then.
+    """
+    course = Course.query.get_or_404(course_id)
+    generated_at = datetime.utcnow()
+    
+    enrollments = db.session.query(Enrollment.id, Enrollment.checked_in).filter(Enrollment.course_id == course_id)
+    revoked = db.session.query(RevokedEnrollment.enrollment_id).filter(RevokedEnrollment.course_id == course_id)
+    
+    since = request.args.get('since')
+    if since:
+        try:
+            since = parse_datetime(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+        enrollments = enrollments.filter(or_(Enrollment.enrolled_at >= since, Enrollment.checked_in_recorded_at >= since))
+        revoked = revoked.filter(RevokedEnrollment.revoked_at >= since)
+    
+    enrollment_rows = enrollments.order_by(Enrollment.id).all()
+    
+    return jsonify({
+        'course_id': course.id,
+        'course_title': course.title,
+        'generated_at': generated_at.isoformat(),
+        'since': since.isoformat() if since else None,
+        'signing_key': encoded_course_signing_key(course.id),
+        'enrollment_ids': [row.id for row in enrollment_rows],
+        'checked_in_ids': [row.id for row in enrollment_rows if row.checked_in],
+        'revoked_ids': sorted(row.enrollment_id for row in revoked)
+    }), 200
+
 @checkin_bp.route('/scan', methods=['POST'])
 def scan_qr_code():
     """Public endpoint to scan QR code (returns enrollment info without checking in)"""
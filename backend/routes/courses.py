@@ -1,33 +1,241 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Course, User, Enrollment
-from datetime import datetime
-from sqlalchemy import and_
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from models import db, Course, User, Enrollment, WaitlistEntry
+from routes.decorators import admin_required
+from routes.enrollments import create_qr_code_image
+from waitlist import promote_from_waitlist, notify_promotions
+from response_cache import response_cache, cached_response
+from events import event_broker
+from search import search_terms, match_subquery, search_supported
+from datetime import datetime, timezone
+from sqlalchemy import and_, or_
+import base64
+import json
 
 courses_bp = Blueprint('courses', __name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def parse_datetime(value):
+    """Parse an ISO 8601 string into a naive UTC datetime"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def encode_cursor(course):
+    """Encode the (start_time, id) keyset position after a course as an opaque token"""
+    payload = json.dumps({'start_time': course.start_time.isoformat(), 'id': course.id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor token into a (start_time, id) tuple"""
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return datetime.fromisoformat(payload['start_time']), int(payload['id'])
+
+def paginate_courses(query, args):
+    """Apply limit/cursor keyset pagination to a query ordered by (start_time, id).
+
+    Rows must start with the Course. Returns (rows, next_cursor) and raises
+    ValueError with a client-facing message for a bad limit or cursor.
+    """
+    try:
+        limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('Invalid limit')
+    
+    if args.get('cursor'):
+        try:
+            cursor_start, cursor_id = decode_cursor(args['cursor'])
+        except (ValueError, KeyError, TypeError):
+            raise ValueError('Invalid cursor')
+        query = query.filter(or_(
+            Course.start_time > cursor_start,
+            and_(Course.start_time == cursor_start, Course.id > cursor_id)
+        ))
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def filter_status(query, status):
+    """Keep 'upcoming' (not yet ended) or 'past' (already ended) courses; ValueError for other values"""
+    if status == 'upcoming':
+        return query.filter(Course.end_time >= datetime.utcnow())
+    if status == 'past':
+        return query.filter(Course.end_time < datetime.utcnow())
+    raise ValueError("Status must be 'upcoming' or 'past'")
+
+def paginate_ranked(query, args):
+    """Apply limit/cursor pagination to search results ordered by rank.
+
+    Ranks have no stable keyset, so the cursor encodes an offset. Returns
+    (rows, next_cursor) and raises ValueError for a bad limit or cursor.
+    """
+    try:
+        limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('Invalid limit')
+    
+    offset = 0
+    if args.get('cursor'):
+        try:
+            offset = max(int(json.loads(base64.urlsafe_b64decode(args['cursor'].encode('ascii')))['offset']), 0)
+        except (ValueError, KeyError, TypeError):
+            raise ValueError('Invalid cursor')
+    
+    rows = query.offset(offset).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        payload = json.dumps({'offset': offset + limit})
+        next_cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+    return rows[:limit], next_cursor
+
+def course_with_my_status(row):
+    """Course dict plus the caller's enrollment and waitlist entry, from a Course.query_for_student row"""
+    course, enrolled_count, checked_in_count, enrollment_id, enrolled_at, checked_in, checked_in_at, qr_code_data, waitlist_id = row
+    data = course.to_dict(enrolled_count=enrolled_count, checked_in_count=checked_in_count)
+    data['my_enrollment'] = {
+        'id': enrollment_id,
+        'enrolled_at': enrolled_at.isoformat() if enrolled_at else None,
+        'checked_in': checked_in,
+        'checked_in_at': checked_in_at.isoformat() if checked_in_at else None,
+        'qr_code_data': qr_code_data
+    } if enrollment_id else None
+    data['my_waitlist_id'] = waitlist_id
+    return data
+
 @courses_bp.route('', methods=['GET'])
+@cached_response(lambda: response_cache.catalog_key(request.args))
 def get_courses():
-    """Get all courses (public endpoint)"""
-    courses = Course.query.order_by(Course.start_time.asc()).all()
-    return jsonify([course.to_dict() for course in courses]), 200
+    """Get courses (public endpoint)
+
+    Optional query parameters:
+      status      'upcoming' (not yet ended) or 'past' (already ended)
+      from, to    only courses starting within [from, to)
+      location    case-insensitive substring match on the location
+      has_seats   'true' to only return courses with free seats
+      limit       page size; enables pagination
+      cursor      next_cursor token from a previous page; enables pagination
+
+    Without limit/cursor the full (filtered) list is returned as before.
+    Paginated responses are {'courses': [...], 'next_cursor': token or null}.
+    """
+    args = request.args
+    has_seats = args.get('has_seats', '').lower() in ['true', '1']
+    query = Course.query_with_counts(has_free_seats=has_seats)
+    
+    try:
+        if args.get('status'):
+            query = filter_status(query, args['status'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if args.get('from'):
+            query = query.filter(Course.start_time >= parse_datetime(args['from']))
+        if args.get('to'):
+            query = query.filter(Course.start_time < parse_datetime(args['to']))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+    
+    if args.get('location'):
+        query = query.filter(Course.location.ilike(f"%{args['location']}%"))
+    
+    query = query.order_by(Course.start_time.asc(), Course.id.asc())
+    paginated = 'limit' in args or 'cursor' in args
+    
+    if not paginated:
+        return jsonify([
+            course.to_dict(enrolled_count=enrolled_count, checked_in_count=checked_in_count)
+            for course, enrolled_count, checked_in_count in query.all()
+        ]), 200
+    
+    try:
+        rows, next_cursor = paginate_courses(query, args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'courses': [
+            course.to_dict(enrolled_count=enrolled_count, checked_in_count=checked_in_count)
+            for course, enrolled_count, checked_in_count in rows
+        ],
+        'next_cursor': next_cursor
+    }), 200
+
+@courses_bp.route('/search', methods=['GET'])
+@cached_response(lambda: response_cache.catalog_key(request.args, 'search'))
+def search_courses():
+    """Full-text search over course title, description and location (public endpoint)
+
+    Query parameters:
+      q        search text; every word must match, as a word prefix
+      status   'upcoming' or 'past'
+      limit    page size
+      cursor   next_cursor token from a previous page
+
+    Returns {'courses': [...], 'next_cursor': token or null}, best matches first.
+    """
+    args = request.args
+    terms = search_terms(args.get('q', ''))
+    if not terms:
+        return jsonify({'error': 'Search query required'}), 400
+    if not search_supported():
+        return jsonify({'error': 'Search is not available on this database'}), 501
+    
+    matches = match_subquery(terms)
+    query = Course.query_with_counts().join(matches, matches.c.id == Course.id)
+    
+    try:
+        if args.get('status'):
+            query = filter_status(query, args['status'])
+        rows, next_cursor = paginate_ranked(query.order_by(matches.c.rank.asc(), Course.id.asc()), args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'courses': [
+            course.to_dict(enrolled_count=enrolled_count, checked_in_count=checked_in_count)
+            for course, enrolled_count, checked_in_count in rows
+        ],
+        'next_cursor': next_cursor
+    }), 200
 
 @courses_bp.route('/<int:course_id>', methods=['GET'])
+@cached_response(lambda course_id: response_cache.course_key(course_id))
 def get_course(course_id):
     """Get a specific course by ID (public endpoint for shareable links)"""
-    course = Course.query.get_or_404(course_id)
-    return jsonify(course.to_dict()), 200
+    row = Course.query_with_counts().filter(Course.id == course_id).first()
+    if row is None:
+        return jsonify({'error': 'Course not found'}), 404
+    
+    course, enrolled_count, checked_in_count = row
+    return jsonify(course.to_dict(enrolled_count=enrolled_count, checked_in_count=checked_in_count)), 200
 
-@courses_bp.route('', methods=['POST'])
+@courses_bp.route('/<int:course_id>/me', methods=['GET'])
 @jwt_required()
-def create_course():
-    """Create a new course (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+def get_my_course(course_id):
+    """Get a course with the current user's enrollment, QR code and waitlist place in one request"""
+    row = Course.query_for_student(get_jwt_identity()).filter(Course.id == course_id).first()
+    if row is None:
+        return jsonify({'error': 'Course not found'}), 404
     
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
+    data = course_with_my_status(row)
+    if data['my_enrollment']:
+        data['my_enrollment']['qr_code_image'] = create_qr_code_image(data['my_enrollment']['qr_code_data'])
+    data['my_waitlist_position'] = None
+    if data['my_waitlist_id']:
+        data['my_waitlist_position'] = WaitlistEntry.query.get(data['my_waitlist_id']).position()
     
+    return jsonify(data), 200
+
+@courses_bp.route('', methods=['POST'])
+@admin_required
+def create_course():
+    """Create a new course (admin only)"""
     data = request.get_json()
     
     if not data or not data.get('title') or not data.get('start_time') or not data.get('end_time'):
@@ -45,7 +253,7 @@ def create_course():
     course = Course(
         title=data['title'],
         description=data.get('description', ''),
-        instructor_id=user_id,
+        instructor_id=get_jwt_identity(),
         start_time=start_time,
         end_time=end_time,
         location=data.get('location', ''),
@@ -55,21 +263,26 @@ def create_course():
     db.session.add(course)
     db.session.commit()
     
+    event_broker.publish(course.id, 'course_created')
+    
     return jsonify(course.to_dict()), 201
 
 @courses_bp.route('/<int:course_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_course(course_id):
     """Update a course (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
     course = Course.query.get_or_404(course_id)
     data = request.get_json()
     
+    capacity = None
+    if 'capacity' in data:
+        try:
+            capacity = int(data['capacity'])
+        except (TypeError, ValueError):
+            capacity = 0
+        if capacity <= 0:
+            return jsonify({'error': 'Capacity must be a positive integer'}), 400
+    
     if 'title' in data:
         course.title = data['title']
     if 'description' in data:
@@ -80,26 +293,30 @@ def update_course(course_id):
         course.end_time = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
     if 'location' in data:
         course.location = data['location']
-    if 'capacity' in data:
-        course.capacity = data['capacity']
+    capacity_increased = capacity is not None and capacity > (course.capacity or 0)
+    if capacity is not None:
+        course.capacity = capacity
     
+    promoted = []
+    if capacity_increased:
+        db.session.flush()
+        promoted = promote_from_waitlist(course)
     db.session.commit()
     
+    event_broker.publish(course.id, 'course_updated')
+    notify_promotions(course, promoted)
+    
     return jsonify(course.to_dict()), 200
 
 @courses_bp.route('/<int:course_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_course(course_id):
     """Delete a course (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
-    course = Course.query.get_or_404(course_id)
-    db.session.delete(course)
+    if not Course.delete_courses([course_id]):
+        return jsonify({'error': 'Course not found'}), 404
     db.session.commit()
     
+    event_broker.publish(course_id, 'course_deleted')
+    
     return jsonify({'message': 'Course deleted'}), 200
 
@@ -0,0 +1,62 @@
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, get_jwt_request_location
+from werkzeug.local import LocalProxy
+from models import User
+
+# Claim of the short-lived tokens that event streams accept from the query string
+EVENTS_SCOPE = 'events'
+
+def is_admin():
+    """Whether the signed JWT carries the admin role claim (no DB lookup)"""
+    return get_jwt().get('role') == 'admin'
+
+def _load_current_user():
+    if 'current_user' not in g:
+        g.current_user = User.query.get(get_jwt_identity())
+    return g.current_user
+
+# User row for the JWT identity, loaded lazily and at most once per request
+current_user = LocalProxy(_load_current_user)
+
+def admin_required(fn):
+    """Require a valid JWT with the admin role claim.
+
+    Authorization trusts the signed role claim set at login, so admin routes do
+    not need to load the user row.
+    """
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+def events_token_required(fn):
+    """Require admin access for an event stream.
+
+    EventSource cannot send headers, so besides a normal token in the
+    Authorization header these routes accept ?jwt=<token>, but only a short-lived
+    token scoped to event streams. Long-lived access tokens never go in URLs.
+    """
+    @wraps(fn)
+    @jwt_required(locations=['headers', 'query_string'])
+    def wrapper(*args, **kwargs):
+        if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != EVENTS_SCOPE:
+            return jsonify({'error': 'Only event stream tokens are accepted in the query string'}), 401
+        if not is_admin():
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    wrapper.accepts_events_token = True
+    return wrapper
+
+def verify_token_scope(jwt_header, jwt_data):
+    """JWT verification hook: scoped tokens only work on routes that accept them"""
+    if jwt_data.get('scope') != EVENTS_SCOPE:
+        return True
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'accepts_events_token', False)
+
+def token_scope_rejected(jwt_header, jwt_data):
+    return jsonify({'error': 'Token is not valid for this endpoint'}), 403
@@ -1,39 +1,34 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Enrollment, Course, User
+from models import db, Enrollment, Course, RevokedEnrollment, WaitlistEntry
+from routes.decorators import admin_required, is_admin
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from qr_codes import qr_cache, QR_FORMATS
+from qr_tokens import generate_qr_token
+from events import event_broker
+from waitlist import promote_from_waitlist, notify_promotions
 import secrets
-import qrcode
-from io import BytesIO
 import base64
 
 enrollments_bp = Blueprint('enrollments', __name__)
 
 def generate_qr_code_data(enrollment_id, course_id, student_id):
-    """Generate unique QR code data for enrollment"""
-    return f"ENROLL:{enrollment_id}:{course_id}:{student_id}:{secrets.token_urlsafe(16)}"
+    """Generate unique, signed QR code data for enrollment"""
+    return generate_qr_token(enrollment_id, course_id, student_id)
 
 def create_qr_code_image(qr_data):
     """Create QR code image and return as base64 string"""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return base64.b64encode(buffer.read()).decode('utf-8')
+    image, _ = qr_cache.get(qr_data, 'png')
+    return base64.b64encode(image).decode('utf-8')
 
 @enrollments_bp.route('', methods=['GET'])
 @jwt_required()
 def get_enrollments():
     """Get enrollments for current user or all enrollments if admin"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
     
-    if user.role == 'admin':
+    if is_admin():
         enrollments = Enrollment.query.all()
     else:
         enrollments = Enrollment.query.filter_by(student_id=user_id).all()
@@ -41,15 +36,9 @@ def get_enrollments():
     return jsonify([enrollment.to_dict() for enrollment in enrollments]), 200
 
 @enrollments_bp.route('/course/<int:course_id>', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_course_enrollments(course_id):
     """Get all enrollments for a specific course (admin only)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
     enrollments = Enrollment.query.filter_by(course_id=course_id).all()
     return jsonify([enrollment.to_dict() for enrollment in enrollments]), 200
 
@@ -58,9 +47,8 @@ def get_course_enrollments(course_id):
 def enroll_in_course():
     """Enroll in a course (student only)"""
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
     
-    if user.role == 'admin':
+    if is_admin():
         return jsonify({'error': 'Admins cannot enroll in courses'}), 403
     
     data = request.get_json()
@@ -80,32 +68,41 @@ def enroll_in_course():
     if existing_enrollment:
         return jsonify({'error': 'Already enrolled in this course'}), 400
     
-    # Check if course is full
-    if course.is_full():
-        return jsonify({'error': 'Course is full'}), 400
-    
     # Check for overlapping enrollments
-    user_enrollments = Enrollment.query.filter_by(student_id=user_id).all()
-    user_courses = [e.course for e in user_enrollments if e.course]
+    conflicting_title = course.find_schedule_conflict(user_id)
+    if conflicting_title:
+        return jsonify({
+            'error': f'This course overlaps with "{conflicting_title}" which you are already enrolled in'
+        }), 400
     
-    for enrolled_course in user_courses:
-        if course.overlaps_with(enrolled_course):
-            return jsonify({
-                'error': f'This course overlaps with "{enrolled_course.title}" which you are already enrolled in'
-            }), 400
+    # Claim a seat atomically; the course row stays locked until commit
+    if not Course.claim_seat(course_id):
+        db.session.rollback()
+        return jsonify({'error': 'Course is full'}), 400
     
-    # Create enrollment
+    # Create enrollment with a placeholder QR payload until the ID is known
     enrollment = Enrollment(
         student_id=user_id,
-        course_id=course_id
+        course_id=course_id,
+        qr_code_data=f"PENDING:{secrets.token_urlsafe(16)}"
     )
     
-    db.session.add(enrollment)
-    db.session.flush()  # Get the enrollment ID
+    try:
+        db.session.add(enrollment)
+        db.session.flush()  # Get the enrollment ID
+        
+        # Generate QR code data
+        enrollment.qr_code_data = generate_qr_code_data(enrollment.id, course_id, user_id)
+        
+        # A student who got a seat directly no longer needs their waitlist place
+        WaitlistEntry.query.filter_by(student_id=user_id, course_id=course_id).delete(synchronize_session=False)
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request enrolled the same student first; the seat is released by the rollback
+        db.session.rollback()
+        return jsonify({'error': 'Already enrolled in this course'}), 400
     
-    # Generate QR code data
-    enrollment.qr_code_data = generate_qr_code_data(enrollment.id, course_id, user_id)
-    db.session.commit()
+    event_broker.publish(course_id, 'enrolled', enrollment_id=enrollment.id, student_id=user_id)
     
     # Generate QR code image
     qr_image = create_qr_code_image(enrollment.qr_code_data)
@@ -118,15 +115,26 @@ def enroll_in_course():
 @enrollments_bp.route('/<int:enrollment_id>/qr', methods=['GET'])
 @jwt_required()
 def get_enrollment_qr(enrollment_id):
-    """Get QR code for an enrollment"""
+    """Get QR code for an enrollment (?format=png|svg returns the raw image with an ETag)"""
     user_id = get_jwt_identity()
     enrollment = Enrollment.query.get_or_404(enrollment_id)
     
     # Check if user owns this enrollment or is admin
-    if enrollment.student_id != user_id:
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Unauthorized'}), 403
+    if enrollment.student_id != user_id and not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    fmt = request.args.get('format')
+    if fmt:
+        # Raw image bytes that browsers can cache, instead of base64 in JSON
+        if fmt not in QR_FORMATS:
+            return jsonify({'error': 'Format must be png or svg'}), 400
+        
+        image, key = qr_cache.get(enrollment.qr_code_data, fmt)
+        response = Response(image, mimetype=QR_FORMATS[fmt])
+        response.set_etag(key)
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config['QR_CACHE_MAX_AGE']
+        return response.make_conditional(request)
     
     qr_image = create_qr_code_image(enrollment.qr_code_data)
     
@@ -143,13 +151,114 @@ def cancel_enrollment(enrollment_id):
     enrollment = Enrollment.query.get_or_404(enrollment_id)
     
     # Check if user owns this enrollment or is admin
-    if enrollment.student_id != user_id:
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
-            return jsonify({'error': 'Unauthorized'}), 403
+    if enrollment.student_id != user_id and not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
     
-    db.session.delete(enrollment)
+    course = enrollment.course
+    course_id, student_id = enrollment.course_id, enrollment.student_id
+    db.session.expunge(enrollment)
+    
+    # Read checked_in as part of the delete, so a concurrent check-in is released too
+    checked_in = Enrollment.cancel(enrollment_id)
+    if checked_in is None:
+        db.session.rollback()
+        return jsonify({'error': 'Enrollment not found'}), 404
+    Course.release_seat(course_id, checked_in=checked_in)
+    db.session.add(RevokedEnrollment(enrollment_id=enrollment_id, course_id=course_id))
+    db.session.flush()
+    
+    # Hand the freed seat to the next waitlisted student in the same transaction
+    promoted = promote_from_waitlist(course)
     db.session.commit()
     
+    event_broker.publish(course_id, 'cancelled', enrollment_id=enrollment_id, student_id=student_id, checked_in=checked_in)
+    notify_promotions(course, promoted)
+    
     return jsonify({'message': 'Enrollment cancelled'}), 200
 
+@enrollments_bp.route('/waitlist', methods=['GET'])
+@jwt_required()
+def get_my_waitlist():
+    """Get the current student's waitlist entries with their queue positions"""
+    user_id = get_jwt_identity()
+    entries = WaitlistEntry.query.filter_by(student_id=user_id).order_by(WaitlistEntry.created_at).all()
+    
+    return jsonify([entry.to_dict() for entry in entries]), 200
+
+@enrollments_bp.route('/waitlist', methods=['POST'])
+@jwt_required()
+def join_waitlist():
+    """Join the waitlist of a full course (student only)"""
+    user_id = get_jwt_identity()
+    
+    if is_admin():
+        return jsonify({'error': 'Admins cannot join waitlists'}), 403
+    
+    data = request.get_json()
+    course_id = data.get('course_id')
+    
+    if not course_id:
+        return jsonify({'error': 'Course ID required'}), 400
+    
+    course = Course.query.get_or_404(course_id)
+    
+    if Enrollment.query.filter_by(student_id=user_id, course_id=course_id).first():
+        return jsonify({'error': 'Already enrolled in this course'}), 400
+    
+    if not course.is_full():
+        return jsonify({'error': 'Course has free seats, enroll instead'}), 400
+    
+    conflicting_title = course.find_schedule_conflict(user_id)
+    if conflicting_title:
+        return jsonify({
+            'error': f'This course overlaps with "{conflicting_title}" which you are already enrolled in'
+        }), 400
+    
+    entry = WaitlistEntry(student_id=user_id, course_id=course_id)
+    
+    try:
+        db.session.add(entry)
+        db.session.flush()
+        
+        # A seat may have been freed after the fullness check with nobody left to promote
+        promoted = promote_from_waitlist(course)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Already on the waitlist for this course'}), 400
+    
+    notify_promotions(course, promoted)
+    
+    if any(student_id == user_id for _, student_id in promoted):
+        enrollment = Enrollment.query.filter_by(student_id=user_id, course_id=course_id).first()
+        return jsonify({'enrollment': enrollment.to_dict()}), 201
+    
+    return jsonify({'waitlist': entry.to_dict()}), 201
+
+@enrollments_bp.route('/waitlist/<int:entry_id>', methods=['DELETE'])
+@jwt_required()
+def leave_waitlist(entry_id):
+    """Leave a waitlist"""
+    user_id = get_jwt_identity()
+    entry = WaitlistEntry.query.get_or_404(entry_id)
+    
+    if entry.student_id != user_id and not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    db.session.delete(entry)
+    db.session.commit()
+    
+    return jsonify({'message': 'Left waitlist'}), 200
+
+@enrollments_bp.route('/course/<int:course_id>/waitlist', methods=['GET'])
+@admin_required
+def get_course_waitlist(course_id):
+    """Get a course's waitlist in promotion order (admin only)"""
+    Course.query.get_or_404(course_id)
+    entries = WaitlistEntry.query.filter_by(course_id=course_id).order_by(WaitlistEntry.id).all()
+    
+    return jsonify([
+        dict(entry.to_dict(position=position), student_name=entry.student.name, student_email=entry.student.email)
+        for position, entry in enumerate(entries, 1)
+    ]), 200
+
@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Course
+from routes.courses import paginate_courses, paginate_ranked, course_with_my_status
+from search import search_terms, match_subquery, search_supported
+from datetime import datetime
+
+me_bp = Blueprint('me', __name__)
+
+@me_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard():
+    """Upcoming courses with the current user's enrollment and waitlist status, from one query per page
+
+    Takes the same limit/cursor parameters as GET /api/courses and returns
+    {'courses': [...], 'next_cursor': token or null}; each course carries
+    my_enrollment (including qr_code_data) and my_waitlist_id. With q, only
+    courses matching the search are returned, best matches first.
+    """
+    query = Course.query_for_student(get_jwt_identity()).filter(Course.end_time >= datetime.utcnow())
+    terms = search_terms(request.args.get('q', ''))
+    
+    try:
+        if terms:
+            if not search_supported():
+                return jsonify({'error': 'Search is not available on this database'}), 501
+            matches = match_subquery(terms)
+            query = query.join(matches, matches.c.id == Course.id).order_by(matches.c.rank.asc(), Course.id.asc())
+            rows, next_cursor = paginate_ranked(query, request.args)
+        else:
+            query = query.order_by(Course.start_time.asc(), Course.id.asc())
+            rows, next_cursor = paginate_courses(query, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'courses': [course_with_my_status(row) for row in rows],
+        'next_cursor': next_cursor
+    }), 200
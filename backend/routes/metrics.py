@@ -0,0 +1,16 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from instrumentation import request_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics for this worker (bearer METRICS_TOKEN required when set)"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+            return jsonify({'error': 'Unauthorized'}), 401
+    
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,78 @@
+"""
+Full-text course search over title, description and location.
+
+SQLite uses an FTS5 table kept in sync with courses by triggers, which only fire
+when a searchable column changes, so seat counter updates don't touch the index.
+Postgres uses a GIN index on a weighted tsvector expression that the database
+maintains itself. Both are created by migration 0006, and by db.create_all()
+through the DDL listeners below.
+
+Every search term matches as a prefix ("pyth work" finds "Python Workshop"),
+all terms must match, and results are ranked with bm25 / ts_rank with title
+matches weighing most.
+"""
+
+import re
+from sqlalchemy import DDL, Float, Integer, event, func, literal_column, select, text
+from models import db, Course
+
+FTS_TABLE = 'courses_fts'
+PG_INDEX = 'ix_courses_search'
+MAX_TERMS = 8
+
+TERM_PATTERN = re.compile(r'\w+')
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "title, description, location, content='courses', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON courses BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description, location) VALUES (new.id, new.title, new.description, new.location); END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON courses BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, location) VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, description, location ON courses BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, location) VALUES ('delete', old.id, old.title, old.description, old.location); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description, location) VALUES (new.id, new.title, new.description, new.location); END"
+]
+
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+PG_DDL = f"CREATE INDEX {PG_INDEX} ON courses USING gin (({PG_VECTOR}))"
+
+for statement in SQLITE_DDL:
+    event.listen(Course.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Course.__table__, 'after_create', DDL(PG_DDL).execute_if(dialect='postgresql'))
+event.listen(Course.__table__, 'before_drop', DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect='sqlite'))
+
+def search_terms(q):
+    """Lowercased words of a search string, without any query syntax"""
+    return TERM_PATTERN.findall(q.lower())[:MAX_TERMS]
+
+def search_supported():
+    return db.engine.dialect.name in ('sqlite', 'postgresql')
+
+def match_subquery(terms):
+    """Subquery of (id, rank) for courses matching every term as a prefix; lower rank is better"""
+    if db.engine.dialect.name == 'postgresql':
+        ts_query = func.to_tsquery('english', ' & '.join(f'{term}:*' for term in terms))
+        vector = literal_column(f'({PG_VECTOR})')
+        return select(
+            Course.id.label('id'),
+            (-func.ts_rank(vector, ts_query)).label('rank')
+        ).where(vector.op('@@')(ts_query)).subquery('matches')
+
+    # bm25 weights follow the FTS column order: title, description, location
+    fts_query = ' '.join(f'"{term}"*' for term in terms)
+    return text(
+        f"SELECT rowid AS id, bm25({FTS_TABLE}, 10.0, 1.0, 5.0) AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query"
+    ).bindparams(fts_query=fts_query).columns(id=Integer, rank=Float).subquery('matches')
+
+def include_name(name, type_, parent_names):
+    """Alembic autogenerate filter: the search index is managed by hand, so never diff it"""
+    if type_ == 'table':
+        return not name.startswith(FTS_TABLE)
+    if type_ == 'index':
+        return name != PG_INDEX
+    return True
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The app reads DATABASE_URL when it is imported, and importing it first loads the
+# routes before modules such as imports that the routes depend on
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='workshop-tests-'), 'test.db')
+from app import app as flask_app
+from models import db
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
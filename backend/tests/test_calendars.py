@@ -0,0 +1,22 @@
+from calendars import FeedCache
+
+def test_invalidations_do_not_accumulate_state():
+    cache = FeedCache()
+    for student_id in range(1000):
+        cache.invalidate(('user', student_id))
+    cache.get(('user', 1), lambda: ('BEGIN:VCALENDAR', {7}))
+
+    assert cache._building == {}
+    assert cache.get(('user', 1), lambda: None) is not None
+
+def test_feed_invalidated_while_building_is_not_stored():
+    cache = FeedCache()
+    key = ('user', 1)
+
+    def build():
+        cache.invalidate(key)
+        return 'stale', set()
+
+    assert cache.get(key, build)[0] == b'stale'
+    assert cache.get(key, lambda: ('fresh', set()))[0] == b'fresh'
+    assert cache._building == {}
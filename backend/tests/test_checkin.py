@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from models import db, User, Course, Enrollment
+from qr_tokens import generate_qr_token
+
+def setup_enrollment():
+    admin = User(email='admin@example.com', name='Admin', role='admin', password_hash='-')
+    student = User(email='s1@example.com', name='S1', role='student', password_hash='-')
+    db.session.add_all([admin, student])
+    db.session.flush()
+    start = datetime.utcnow() + timedelta(hours=1)
+    course = Course(title='Alpha', instructor_id=admin.id, start_time=start,
+                    end_time=start + timedelta(hours=2), location='Room 1', capacity=5, seats_taken=1)
+    db.session.add(course)
+    db.session.flush()
+    enrollment = Enrollment(student_id=student.id, course_id=course.id, qr_code_data='pending')
+    db.session.add(enrollment)
+    db.session.flush()
+    enrollment.qr_code_data = generate_qr_token(enrollment.id, course.id, student.id)
+    db.session.commit()
+    token = create_access_token(identity=admin.id, additional_claims={'role': 'admin'})
+    return course.id, enrollment, {'Authorization': f'Bearer {token}'}
+
+def test_delta_manifest_includes_offline_scan_synced_after_it_was_pulled(app):
+    course_id, enrollment, headers = setup_enrollment()
+    client = app.test_client()
+
+    scanned_at = datetime.utcnow()
+    pulled = client.get(f'/api/checkin/course/{course_id}/manifest', headers=headers).get_json()
+    assert pulled['checked_in_ids'] == []
+
+    response = client.post('/api/checkin/batch', headers=headers, json={'qr_codes': [
+        {'qr_code_data': enrollment.qr_code_data, 'scanned_at': scanned_at.isoformat()}
+    ]})
+    assert response.get_json()['summary']['checked_in'] == 1
+
+    delta = client.get(
+        f"/api/checkin/course/{course_id}/manifest?since={pulled['generated_at']}", headers=headers
+    ).get_json()
+    assert delta['checked_in_ids'] == [enrollment.id]
+
+def test_future_scan_time_is_clamped(app):
+    course_id, enrollment, headers = setup_enrollment()
+    future = datetime.utcnow() + timedelta(days=3)
+
+    app.test_client().post('/api/checkin/batch', headers=headers, json={'qr_codes': [
+        {'qr_code_data': enrollment.qr_code_data, 'scanned_at': future.isoformat()}
+    ]})
+
+    checked_in_at = db.session.get(Enrollment, enrollment.id).checked_in_at
+    assert checked_in_at <= datetime.utcnow()
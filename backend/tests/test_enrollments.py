@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from models import db, User, Course, Enrollment
+
+def setup_checked_in_enrollment():
+    admin = User(email='admin@example.com', name='Admin', role='admin', password_hash='-')
+    student = User(email='s1@example.com', name='S1', role='student', password_hash='-')
+    db.session.add_all([admin, student])
+    db.session.flush()
+    start = datetime.utcnow() + timedelta(days=1)
+    course = Course(title='Alpha', instructor_id=admin.id, start_time=start, end_time=start + timedelta(hours=2),
+                    location='Room 1', capacity=5, seats_taken=1, seats_checked_in=0)
+    db.session.add(course)
+    db.session.flush()
+    enrollment = Enrollment(student_id=student.id, course_id=course.id, qr_code_data='code-1')
+    db.session.add(enrollment)
+    db.session.commit()
+    return student, course, enrollment
+
+def test_cancel_reads_a_check_in_committed_after_the_row_was_loaded(app):
+    _, _, enrollment = setup_checked_in_enrollment()
+    assert enrollment.checked_in is False
+
+    # A concurrent check-in the loaded object does not see
+    db.session.execute(update(Enrollment).where(Enrollment.id == enrollment.id).values(checked_in=True))
+
+    assert Enrollment.cancel(enrollment.id) is True
+    assert Enrollment.cancel(enrollment.id) is None
+
+def test_cancelling_a_checked_in_enrollment_releases_both_counters(app):
+    student, course, enrollment = setup_checked_in_enrollment()
+    Enrollment.check_in_by_qr(['code-1'])
+    db.session.commit()
+
+    token = create_access_token(identity=student.id, additional_claims={'role': 'student'})
+    response = app.test_client().delete(f'/api/enrollments/{enrollment.id}', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    db.session.expire_all()
+    course = db.session.get(Course, course.id)
+    assert (course.seats_taken, course.seats_checked_in) == (0, 0)
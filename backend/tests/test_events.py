@@ -0,0 +1,30 @@
+from flask_jwt_extended import create_access_token
+from models import db, User
+
+def admin_token():
+    admin = User(email='admin@example.com', name='Admin', role='admin', password_hash='-')
+    db.session.add(admin)
+    db.session.commit()
+    return create_access_token(identity=admin.id, additional_claims={'role': 'admin'})
+
+def test_access_token_is_rejected_in_the_query_string(app):
+    token = admin_token()
+    response = app.test_client().get(f'/api/admin/events?jwt={token}', buffered=False)
+    assert response.status_code == 401
+
+def test_stream_token_opens_the_stream_from_the_query_string(app):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {admin_token()}'}
+    issued = client.post('/api/admin/events/token', headers=headers).get_json()
+    assert issued['expires_in'] == app.config['EVENTS_TOKEN_TTL']
+
+    response = client.get(f"/api/admin/events?jwt={issued['token']}", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    response.close()
+
+def test_stream_token_is_rejected_on_other_routes(app):
+    client = app.test_client()
+    issued = client.post('/api/admin/events/token', headers={'Authorization': f'Bearer {admin_token()}'}).get_json()
+    response = client.get('/api/admin/analytics', headers={'Authorization': f"Bearer {issued['token']}"})
+    assert response.status_code == 403
@@ -0,0 +1,13 @@
+from flask_jwt_extended import create_access_token
+from models import db, User
+
+def test_invalid_course_id_is_rejected(app):
+    admin = User(email='admin@example.com', name='Admin', role='admin', password_hash='-')
+    db.session.add(admin)
+    db.session.commit()
+    token = create_access_token(identity=admin.id, additional_claims={'role': 'admin'})
+
+    response = app.test_client().get('/api/admin/export/enrollments?course_id=abc', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid course_id'}
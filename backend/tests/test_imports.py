@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from models import db, User, Course, Enrollment
+from imports import import_enrollments
+
+def make_course(admin, title, start, hours=2, capacity=1):
+    course = Course(title=title, instructor_id=admin.id, start_time=start,
+                    end_time=start + timedelta(hours=hours), location='Room 1', capacity=capacity)
+    db.session.add(course)
+    return course
+
+def make_users(*emails):
+    users = [User(email=email, name=email, role='student', password_hash='-') for email in emails]
+    admin = User(email='admin@example.com', name='Admin', role='admin', password_hash='-')
+    db.session.add_all(users + [admin])
+    db.session.flush()
+    return admin, users
+
+def errors_by_row(report):
+    return {error['row']: error['error'] for error in report.errors}
+
+def test_row_overlapping_existing_enrollment_does_not_take_a_seat(app):
+    start = datetime.utcnow() + timedelta(days=1)
+    admin, (s1, s2) = make_users('s1@example.com', 's2@example.com')
+    alpha = make_course(admin, 'Alpha', start, capacity=5)
+    beta = make_course(admin, 'Beta', start + timedelta(hours=1))
+    db.session.flush()
+    db.session.add(Enrollment(student_id=s1.id, course_id=alpha.id, qr_code_data='existing'))
+    alpha.seats_taken = 1
+    db.session.commit()
+
+    report = import_enrollments([
+        {'student_email': 's1@example.com', 'course_id': beta.id},
+        {'student_email': 's2@example.com', 'course_id': beta.id}
+    ])
+
+    assert report.created == 1
+    assert 'Alpha' in errors_by_row(report)[1]
+    assert 2 not in errors_by_row(report)
+    assert Enrollment.query.filter_by(course_id=beta.id, student_id=s2.id).count() == 1
+
+def test_full_course_does_not_knock_out_an_overlapping_free_one(app):
+    start = datetime.utcnow() + timedelta(days=1)
+    admin, (s1, s2) = make_users('s1@example.com', 's2@example.com')
+    full = make_course(admin, 'Full', start)
+    free = make_course(admin, 'Free', start + timedelta(hours=1), capacity=5)
+    db.session.flush()
+    full.seats_taken = 1
+    db.session.commit()
+
+    report = import_enrollments([
+        {'student_email': 's1@example.com', 'course_id': full.id},
+        {'student_email': 's1@example.com', 'course_id': free.id}
+    ])
+
+    assert report.created == 1
+    assert errors_by_row(report) == {1: 'Course is full'}
+    assert Enrollment.query.filter_by(course_id=free.id, student_id=s1.id).count() == 1
+
+def test_row_dropped_for_overlap_in_import_leaves_its_seat(app):
+    start = datetime.utcnow() + timedelta(days=1)
+    admin, (s1, s2) = make_users('s1@example.com', 's2@example.com')
+    alpha = make_course(admin, 'Alpha', start, capacity=5)
+    beta = make_course(admin, 'Beta', start + timedelta(hours=1))
+    db.session.commit()
+
+    report = import_enrollments([
+        {'student_email': 's1@example.com', 'course_id': alpha.id},
+        {'student_email': 's1@example.com', 'course_id': beta.id},
+        {'student_email': 's2@example.com', 'course_id': beta.id}
+    ])
+
+    assert report.created == 2
+    assert errors_by_row(report) == {2: 'This course overlaps with "Alpha" in the same import'}
+    assert Enrollment.query.filter_by(course_id=beta.id, student_id=s2.id).count() == 1
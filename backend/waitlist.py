@@ -0,0 +1,97 @@
+"""
+Waitlist promotion for full courses.
+
+Students wait in per-course FIFO queues. Whenever seats free up, the oldest
+entries whose owners have no schedule conflict are turned into enrollments in the
+same transaction that freed the seats. Promotions for one course serialize on the
+course row locked by claim_seat/release_seat, and each entry is claimed with a
+DELETE by id, so concurrent cancellations never promote a student twice or
+hand out more seats than were freed.
+"""
+
+import secrets
+from flask_mail import Message
+from sqlalchemy import delete
+from models import db, Course, Enrollment, User, WaitlistEntry
+from qr_tokens import generate_qr_token
+from events import event_broker
+from reminders import reminder_dispatcher
+
+def promote_from_waitlist(course):
+    """Fill the free seats of `course` from its waitlist, oldest entry first.
+
+    Students with a schedule conflict keep their place and are skipped. Runs in
+    the caller's transaction; returns (enrollment_id, student_id) pairs to pass to
+    notify_promotions once the caller has committed.
+    """
+    promoted = []
+    after_id = 0
+    
+    while True:
+        entry = WaitlistEntry.query.filter(
+            WaitlistEntry.course_id == course.id,
+            WaitlistEntry.id > after_id
+        ).order_by(WaitlistEntry.id).first()
+        if entry is None:
+            break
+        after_id = entry.id
+        
+        if course.find_schedule_conflict(entry.student_id):
+            continue
+        
+        if not Course.claim_seat(course.id):
+            break
+        
+        # Only one transaction can delete the entry; a loser gives its seat back
+        claimed = db.session.execute(delete(WaitlistEntry).where(WaitlistEntry.id == entry.id)).rowcount
+        already_enrolled = Enrollment.query.filter_by(student_id=entry.student_id, course_id=course.id).first()
+        if not claimed or already_enrolled:
+            Course.release_seat(course.id)
+            continue
+        
+        enrollment = Enrollment(
+            student_id=entry.student_id,
+            course_id=course.id,
+            qr_code_data=f"PENDING:{secrets.token_urlsafe(16)}"
+        )
+        db.session.add(enrollment)
+        db.session.flush()
+        enrollment.qr_code_data = generate_qr_token(enrollment.id, course.id, entry.student_id)
+        promoted.append((enrollment.id, entry.student_id))
+    
+    return promoted
+
+def build_promotion_message(course, student_name, student_email):
+    """Build the email telling a student they got a seat off the waitlist"""
+    return Message(
+        subject=f'You are enrolled: {course["title"]}',
+        recipients=[student_email],
+        body=f'''Hello {student_name},
+
+A seat opened up and you have been enrolled from the waitlist in:
+
+{course["title"]}
+Date: {course["start_time"].strftime('%Y-%m-%d %H:%M')}
+Location: {course["location"] or 'TBA'}
+
+Your QR code for check-in is available in your dashboard.
+'''
+    )
+
+def notify_promotions(course, promoted):
+    """Publish events and queue emails for promoted students; call after commit"""
+    if not promoted:
+        return
+    
+    for enrollment_id, student_id in promoted:
+        event_broker.publish(course.id, 'enrolled', enrollment_id=enrollment_id, student_id=student_id, from_waitlist=True)
+    
+    recipients = db.session.query(User.name, User.email).filter(
+        User.id.in_([student_id for _, student_id in promoted])
+    ).all()
+    reminder_dispatcher.submit({
+        'id': course.id,
+        'title': course.title,
+        'start_time': course.start_time,
+        'location': course.location
+    }, [(name, email) for name, email in recipients], build_message=build_promotion_message)
@@ -55,6 +55,76 @@ const AdminDashboard = () => {
     fetchAnalytics()
   }, [])
 
+  // Apply live enrollment and check-in events instead of re-fetching analytics
+  useEffect(() => {
+    if (!localStorage.getItem('token')) return
+
+    let source: EventSource | null = null
+    let retry: ReturnType<typeof setTimeout> | undefined
+    let closed = false
+
+    // EventSource cannot send headers, so each connection uses a fresh short-lived stream token
+    const connect = async () => {
+      let token: string
+      try {
+        const response = await api.post('/admin/events/token')
+        token = response.data.token
+      } catch (error) {
+        console.error('Failed to open event stream:', error)
+        return
+      }
+      if (closed) return
+
+      source = new EventSource(`/api/admin/events?jwt=${encodeURIComponent(token)}`)
+      source.onerror = () => {
+        // The stream token has expired by the time the browser retries, so reconnect with a new one
+        source?.close()
+        if (!closed) retry = setTimeout(connect, 3000)
+      }
+      source.onmessage = onEvent
+    }
+
+    const onEvent = (message: MessageEvent) => {
+      const event = JSON.parse(message.data)
+      const enrolledDelta = event.type === 'enrolled' ? 1 : event.type === 'cancelled' ? -1 : 0
+      const checkedInDelta =
+        event.type === 'checked_in' ? 1 : event.type === 'cancelled' && event.checked_in ? -1 : 0
+
+      setAnalytics((prev) =>
+        prev.map((stat) => {
+          if (stat.course_id !== event.course_id) return stat
+          const totalEnrolled = stat.total_enrolled + enrolledDelta
+          const checkedIn = stat.checked_in + checkedInDelta
+          return {
+            ...stat,
+            total_enrolled: totalEnrolled,
+            checked_in: checkedIn,
+            not_checked_in: totalEnrolled - checkedIn,
+            attendance_rate: totalEnrolled ? (checkedIn / totalEnrolled) * 100 : 0,
+          }
+        })
+      )
+      setCourses((prev) =>
+        prev.map((course) =>
+          course.id === event.course_id
+            ? {
+                ...course,
+                enrolled_count: course.enrolled_count + enrolledDelta,
+                checked_in_count: course.checked_in_count + checkedInDelta,
+              }
+            : course
+        )
+      )
+    }
+
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(retry)
+      source?.close()
+    }
+  }, [])
+
   const fetchCourses = async () => {
     try {
       const response = await api.get('/courses')
@@ -106,7 +176,13 @@ const AdminDashboard = () => {
     setSendingReminders(courseId)
     try {
       const response = await api.post(`/admin/course/${courseId}/reminders`)
-      alert(`Reminders sent: ${response.data.sent_count}, Failed: ${response.data.failed_count}`)
+      let job = response.data.job
+      // Reminders are sent in the background; poll until the job finishes
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000))
+        job = (await api.get(`/admin/reminders/${job.id}`)).data
+      }
+      alert(`Reminders sent: ${job.sent_count}, Failed: ${job.failed_count}`)
     } catch (error: any) {
       alert(error.response?.data?.error || 'Failed to send reminders')
     } finally {
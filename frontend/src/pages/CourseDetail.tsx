@@ -6,7 +6,7 @@ import { Button } from '../components/ui/button'
 import { Badge } from '../components/ui/badge'
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle } from '../components/ui/dialog'
 import { format } from 'date-fns'
-import { Calendar, MapPin, Users, Clock, ArrowLeft, Share2, QrCode } from 'lucide-react'
+import { Calendar, CalendarPlus, MapPin, Users, Clock, ArrowLeft, Share2, QrCode } from 'lucide-react'
 import { QRCodeSVG } from 'qrcode.react'
 
 interface Course {
@@ -29,11 +29,18 @@ interface Enrollment {
   qr_code_data: string
 }
 
+interface WaitlistEntry {
+  id: number
+  course_id: number
+  position: number
+}
+
 const CourseDetail = () => {
   const { id } = useParams<{ id: string }>()
   const navigate = useNavigate()
   const [course, setCourse] = useState<Course | null>(null)
   const [enrollment, setEnrollment] = useState<Enrollment | null>(null)
+  const [waitlistEntry, setWaitlistEntry] = useState<WaitlistEntry | null>(null)
   const [loading, setLoading] = useState(true)
   const [enrolling, setEnrolling] = useState(false)
   const [showQR, setShowQR] = useState(false)
@@ -42,14 +49,24 @@ const CourseDetail = () => {
   useEffect(() => {
     if (id) {
       fetchCourse()
-      fetchEnrollment()
     }
   }, [id])
 
+  // Course, the student's enrollment with its QR code, and their waitlist place in one request
   const fetchCourse = async () => {
     try {
-      const response = await api.get(`/courses/${id}`)
-      setCourse(response.data)
+      const response = await api.get(`/courses/${id}/me`)
+      const { my_enrollment, my_waitlist_id, my_waitlist_position, ...courseData } = response.data
+      setCourse(courseData)
+      setEnrollment(my_enrollment)
+      if (my_enrollment) {
+        setQrImage(my_enrollment.qr_code_image)
+      }
+      setWaitlistEntry(
+        my_waitlist_id
+          ? { id: my_waitlist_id, course_id: courseData.id, position: my_waitlist_position }
+          : null
+      )
     } catch (error) {
       console.error('Failed to fetch course:', error)
     } finally {
@@ -57,22 +74,31 @@ const CourseDetail = () => {
     }
   }
 
-  const fetchEnrollment = async () => {
+  const handleJoinWaitlist = async () => {
+    if (!id) return
+    setEnrolling(true)
     try {
-      const response = await api.get('/enrollments')
-      const myEnrollment = response.data.find((e: any) => e.course_id === parseInt(id!))
-      if (myEnrollment) {
-        setEnrollment(myEnrollment)
-        // Fetch QR code
-        try {
-          const qrResponse = await api.get(`/enrollments/${myEnrollment.id}/qr`)
-          setQrImage(qrResponse.data.qr_code_image)
-        } catch (error) {
-          console.error('Failed to fetch QR code:', error)
-        }
+      const response = await api.post('/enrollments/waitlist', { course_id: parseInt(id) })
+      if (response.data.enrollment) {
+        // A seat opened up while joining, so the student was enrolled directly
+        await fetchCourse()
+      } else {
+        setWaitlistEntry(response.data.waitlist)
       }
-    } catch (error) {
-      console.error('Failed to fetch enrollment:', error)
+    } catch (error: any) {
+      alert(error.response?.data?.error || 'Failed to join waitlist')
+    } finally {
+      setEnrolling(false)
+    }
+  }
+
+  const handleLeaveWaitlist = async () => {
+    if (!waitlistEntry) return
+    try {
+      await api.delete(`/enrollments/waitlist/${waitlistEntry.id}`)
+      setWaitlistEntry(null)
+    } catch (error: any) {
+      alert(error.response?.data?.error || 'Failed to leave waitlist')
     }
   }
 
@@ -98,6 +124,16 @@ const CourseDetail = () => {
     alert('Link copied to clipboard!')
   }
 
+  const handleAddToCalendar = async () => {
+    try {
+      const response = await api.get(`/calendar/course/${id}/token`)
+      navigator.clipboard.writeText(response.data.url)
+      alert('Calendar subscription link copied! Add it to your calendar app as a URL subscription.')
+    } catch (error: any) {
+      alert(error.response?.data?.error || 'Failed to get calendar link')
+    }
+  }
+
   if (loading) {
     return <div className="text-center py-8">Loading course details...</div>
   }
@@ -123,10 +159,16 @@ const CourseDetail = () => {
             <h1 className="text-3xl font-bold mb-2">{course.title}</h1>
             <p className="text-muted-foreground">by {course.instructor_name}</p>
           </div>
-          <Button variant="outline" onClick={handleShare}>
-            <Share2 className="h-4 w-4 mr-2" />
-            Share
-          </Button>
+          <div className="flex gap-2">
+            <Button variant="outline" onClick={handleAddToCalendar}>
+              <CalendarPlus className="h-4 w-4 mr-2" />
+              Add to Calendar
+            </Button>
+            <Button variant="outline" onClick={handleShare}>
+              <Share2 className="h-4 w-4 mr-2" />
+              Share
+            </Button>
+          </div>
         </div>
       </div>
 
@@ -204,10 +246,24 @@ const CourseDetail = () => {
                 </>
               ) : (
                 <>
-                  {isFull ? (
-                    <Badge variant="destructive" className="w-full justify-center py-2">
-                      Course is Full
-                    </Badge>
+                  {waitlistEntry ? (
+                    <>
+                      <Badge variant="secondary" className="w-full justify-center py-2">
+                        On waitlist (position {waitlistEntry.position})
+                      </Badge>
+                      <Button variant="outline" className="w-full" onClick={handleLeaveWaitlist}>
+                        Leave Waitlist
+                      </Button>
+                    </>
+                  ) : isFull ? (
+                    <>
+                      <Badge variant="destructive" className="w-full justify-center py-2">
+                        Course is Full
+                      </Badge>
+                      <Button variant="outline" className="w-full" onClick={handleJoinWaitlist} disabled={enrolling}>
+                        {enrolling ? 'Joining...' : 'Join Waitlist'}
+                      </Button>
+                    </>
                   ) : (
                     <Button className="w-full" onClick={handleEnroll} disabled={enrolling}>
                       {enrolling ? 'Enrolling...' : 'Enroll in Course'}
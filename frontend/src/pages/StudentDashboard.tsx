@@ -4,8 +4,9 @@ import api from '../lib/api'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../components/ui/card'
 import { Button } from '../components/ui/button'
 import { Badge } from '../components/ui/badge'
+import { Input } from '../components/ui/input'
 import { format } from 'date-fns'
-import { Calendar, MapPin, Users, Clock } from 'lucide-react'
+import { Calendar, CalendarPlus, MapPin, Users, Clock, Search } from 'lucide-react'
 
 interface Course {
   id: number
@@ -18,22 +19,39 @@ interface Course {
   capacity: number
   enrolled_count: number
   checked_in_count: number
+  my_enrollment: { id: number; checked_in: boolean } | null
+  my_waitlist_id: number | null
 }
 
+const PAGE_SIZE = 24
+const SEARCH_DELAY_MS = 300
+
 const StudentDashboard = () => {
   const [courses, setCourses] = useState<Course[]>([])
   const [loading, setLoading] = useState(true)
-  const [enrolledCourseIds, setEnrolledCourseIds] = useState<Set<number>>(new Set())
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [search, setSearch] = useState('')
+  const [query, setQuery] = useState('')
+
+  // Wait for a pause in typing before searching
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery(search.trim()), SEARCH_DELAY_MS)
+    return () => clearTimeout(timer)
+  }, [search])
 
   useEffect(() => {
     fetchCourses()
-    fetchEnrollments()
-  }, [])
+  }, [query])
 
-  const fetchCourses = async () => {
+  const fetchCourses = async (cursor?: string) => {
     try {
-      const response = await api.get('/courses')
-      setCourses(response.data)
+      // Upcoming courses with the student's own enrollment status, in one request per page
+      const response = await api.get('/me/dashboard', {
+        params: { limit: PAGE_SIZE, cursor, q: query || undefined },
+      })
+      setCourses((prev) => (cursor ? [...prev, ...response.data.courses] : response.data.courses))
+      setNextCursor(response.data.next_cursor)
     } catch (error) {
       console.error('Failed to fetch courses:', error)
     } finally {
@@ -41,40 +59,76 @@ const StudentDashboard = () => {
     }
   }
 
-  const fetchEnrollments = async () => {
-    try {
-      const response = await api.get('/enrollments')
-      const enrolledIds = new Set(response.data.map((e: any) => e.course_id))
-      setEnrolledCourseIds(enrolledIds)
-    } catch (error) {
-      console.error('Failed to fetch enrollments:', error)
-    }
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    await fetchCourses(nextCursor)
+    setLoadingMore(false)
   }
 
   const handleEnroll = async (courseId: number) => {
     try {
-      await api.post('/enrollments', { course_id: courseId })
-      setEnrolledCourseIds(new Set([...enrolledCourseIds, courseId]))
+      const response = await api.post('/enrollments', { course_id: courseId })
+      setCourses((prev) =>
+        prev.map((course) =>
+          course.id === courseId
+            ? {
+                ...course,
+                enrolled_count: course.enrolled_count + 1,
+                my_enrollment: response.data.enrollment,
+                my_waitlist_id: null,
+              }
+            : course
+        )
+      )
       alert('Successfully enrolled!')
     } catch (error: any) {
       alert(error.response?.data?.error || 'Failed to enroll')
     }
   }
 
+  const handleSubscribe = async () => {
+    try {
+      const response = await api.get('/calendar/token')
+      navigator.clipboard.writeText(response.data.url)
+      alert('Calendar subscription link copied! Add it to your calendar app to see your booked workshops.')
+    } catch (error: any) {
+      alert(error.response?.data?.error || 'Failed to get calendar link')
+    }
+  }
+
   if (loading) {
     return <div className="text-center py-8">Loading courses...</div>
   }
 
   return (
     <div>
-      <div className="mb-8">
-        <h1 className="text-3xl font-bold mb-2">Available Workshops</h1>
-        <p className="text-muted-foreground">Browse and enroll in workshops</p>
+      <div className="mb-8 flex items-start justify-between gap-4">
+        <div>
+          <h1 className="text-3xl font-bold mb-2">Available Workshops</h1>
+          <p className="text-muted-foreground">Browse and enroll in workshops</p>
+        </div>
+        <Button variant="outline" onClick={handleSubscribe}>
+          <CalendarPlus className="h-4 w-4 mr-2" />
+          Subscribe to Calendar
+        </Button>
+      </div>
+
+      <div className="relative mb-6 max-w-md">
+        <Search className="absolute left-3 top-1/2 h-4 w-4 -translate-y-1/2 text-muted-foreground" />
+        <Input
+          type="search"
+          placeholder="Search workshops by title, description or location"
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+          className="pl-9"
+        />
       </div>
 
       <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
         {courses.map((course) => {
-          const isEnrolled = enrolledCourseIds.has(course.id)
+          const isEnrolled = course.my_enrollment !== null
+          const isWaitlisted = course.my_waitlist_id !== null
           const isFull = course.enrolled_count >= course.capacity
           const startDate = new Date(course.start_time)
           const endDate = new Date(course.end_time)
@@ -118,6 +172,8 @@ const StudentDashboard = () => {
                   </Link>
                   {isEnrolled ? (
                     <Badge variant="secondary">Enrolled</Badge>
+                  ) : isWaitlisted ? (
+                    <Badge variant="outline">Waitlisted</Badge>
                   ) : isFull ? (
                     <Badge variant="destructive">Full</Badge>
                   ) : (
@@ -132,9 +188,19 @@ const StudentDashboard = () => {
         })}
       </div>
 
+      {nextCursor && (
+        <div className="flex justify-center mt-8">
+          <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </Button>
+        </div>
+      )}
+
       {courses.length === 0 && (
         <div className="text-center py-12">
-          <p className="text-muted-foreground">No courses available at the moment.</p>
+          <p className="text-muted-foreground">
+            {query ? `No workshops match "${query}".` : 'No courses available at the moment.'}
+          </p>
         </div>
       )}
     </div>